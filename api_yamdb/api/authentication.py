@@ -0,0 +1,171 @@
+"""
+JWT аутентификация без запроса пользователя на каждый запрос.
+
+JWTAuthentication читает CustomUser из БД при каждом запросе только
+ради role и is_superuser в пермишенах. CachedJWTAuthentication хранит
+в кэше JWT_USER_CACHE_ALIAS только поля CACHED_USER_FIELDS (без хэша
+пароля и кода подтверждения) по id на JWT_USER_CACHE_TIMEOUT секунд;
+запись сбрасывается при сохранении и удалении пользователя
+(api/signals.py). Кэш должен быть общим для всех процессов
+(проверка api.E001), иначе сброс дошёл бы только до одного воркера.
+
+Токен из AccessTokenView дополнительно содержит подписанные поля
+username, role, superuser и время выпуска iat. При JWT_TRUST_ROLE_CLAIM
+пользователь собирается из них без чтения его записи: ни активность,
+ни существование пользователя не проверяются. Вместо этого смена роли,
+активности или удаление пользователя отзывают токены (revoke_tokens),
+и токены, выпущенные раньше отзыва, отклоняются.
+
+Время отзыва хранится в CustomUser.tokens_revoked_at, а кэш лишь
+ускоряет его чтение (revoked_at). Запись кэша может быть вытеснена,
+тогда время читается из БД; пользователь, которого нет в БД, считается
+отозвавшим все токены.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import CustomUser
+
+USER_KEY_PREFIX = 'jwt-user'
+REVOKED_KEY_PREFIX = 'jwt-revoked'
+ROLE_CLAIMS = ('username', 'role', 'superuser', 'iat')
+# Время отзыва для удалённого пользователя: отклоняются все токены.
+USER_DELETED = float('inf')
+# Поля пользователя, которых достаточно пермишенам и троттлингу.
+CACHED_USER_FIELDS = ('pk', 'username', 'role', 'is_active', 'is_superuser')
+
+
+def user_cache():
+    return caches[settings.JWT_USER_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f'{USER_KEY_PREFIX}:{user_id}'
+
+
+def revoked_key(user_id):
+    return f'{REVOKED_KEY_PREFIX}:{user_id}'
+
+
+def invalidate_user(user_id):
+    """
+    Сбрасывает кэш пользователя сейчас и после фиксации транзакции:
+    параллельный запрос мог успеть закэшировать старую запись.
+    """
+    key = user_key(user_id)
+    user_cache().delete(key)
+    transaction.on_commit(lambda: user_cache().delete(key))
+
+
+def revoke_tokens(user_id):
+    """
+    Отклоняет токены с ролью пользователя, выпущенные до этого момента.
+    Время отзыва записывается в БД в текущей транзакции и в кэш сейчас
+    и после её фиксации: токен, выпущенный до фиксации, содержит старую
+    роль. Возвращает время отзыва для сохраняемого объекта.
+    """
+    revoked = timezone.now()
+    CustomUser.objects.filter(pk=user_id).update(tokens_revoked_at=revoked)
+    key = revoked_key(user_id)
+    value = revoked.timestamp()
+    timeout = settings.JWT_USER_CACHE_TIMEOUT
+    user_cache().set(key, value, timeout)
+    transaction.on_commit(lambda: user_cache().set(key, value, timeout))
+    return revoked
+
+
+def revoked_at(user_id):
+    """
+    Время отзыва токенов пользователя (unix time, 0 — не отзывались).
+    При промахе кэша читается из БД; add() не затирает отметку,
+    записанную revoke_tokens() во время чтения.
+    """
+    key = revoked_key(user_id)
+    value = user_cache().get(key)
+    if value is None:
+        rows = CustomUser.objects.filter(pk=user_id).values_list(
+            'tokens_revoked_at', flat=True
+        )
+        found = list(rows[:1])
+        if not found:
+            value = USER_DELETED
+        else:
+            value = found[0].timestamp() if found[0] else 0
+        user_cache().add(key, value, settings.JWT_USER_CACHE_TIMEOUT)
+    return value
+
+
+def token_for_user(user):
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['superuser'] = user.is_superuser
+    token['iat'] = time.time()
+    return token
+
+
+def partial_user(**fields):
+    """
+    Неполная запись пользователя для пермишенов, её нельзя сохранять.
+    Полную запись возвращает current_user().
+    """
+    user = CustomUser(**fields)
+    user.is_partial = True
+    return user
+
+
+def user_from_claims(user_id, validated_token):
+    if validated_token['iat'] <= revoked_at(user_id):
+        raise AuthenticationFailed(
+            'Token was revoked', code='token_revoked'
+        )
+    return partial_user(
+        pk=user_id,
+        username=validated_token['username'],
+        role=validated_token['role'],
+        is_superuser=validated_token['superuser'],
+    )
+
+
+def current_user(request):
+    """Полная запись пользователя, если request.user неполный."""
+    if getattr(request.user, 'is_partial', False):
+        return get_object_or_404(CustomUser, pk=request.user.pk)
+    return request.user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        if settings.JWT_TRUST_ROLE_CLAIM and all(
+            claim in validated_token for claim in ROLE_CLAIMS
+        ):
+            return user_from_claims(user_id, validated_token)
+        key = user_key(user_id)
+        fields = user_cache().get(key)
+        if fields is None:
+            user = super().get_user(validated_token)
+            user_cache().set(
+                key,
+                tuple(getattr(user, name) for name in CACHED_USER_FIELDS),
+                settings.JWT_USER_CACHE_TIMEOUT,
+            )
+            return user
+        user = partial_user(**dict(zip(CACHED_USER_FIELDS, fields)))
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,328 @@
+"""
+Бенчмарк эндпоинтов API.
+
+Для каждого маршрута роутера api/urls.py выполняются GET запросы
+(и запись отзыва) через тестовый клиент с настоящей JWT авторизацией.
+По каждому сценарию фиксируются число SQL запросов, p50/p99 времени
+ответа и пик выделенной памяти; результаты сравниваются с базовой
+линией из файла.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.db.models import Count
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import (USER_ROLE_ADMIN, Comment, CustomUser, Genre,
+                            Review, Title)
+
+from .fastread import (CommentRowSerializer, GenreRowSerializer,
+                       ReviewRowSerializer, TitleRowSerializer)
+from .serializers import (CommentSerializer, GenreSerializer,
+                          ReviewSerializer, TitleReadSerializer)
+from .sql import execute_wrapper_all
+from .throttling import throttle_store
+from .urls import router_v1
+
+BENCHMARK_USERNAME = 'benchmark-admin'
+BENCHMARK_HOST = 'localhost'
+MIN_DELTA = {'p50_ms': 2, 'p99_ms': 5, 'memory_kib': 16}
+# Строк в одной выборке при замере скорости сериализации.
+ROW_BENCHMARK_LIMIT = 1000
+
+
+class Scenario:
+    """
+    Один измеряемый запрос. cleanup(response) выполняется после
+    каждого запроса вне замера и возвращает данные в исходное состояние.
+    """
+
+    def __init__(self, name, method, url, data=None, cleanup=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.cleanup = cleanup
+
+    def request(self, client):
+        return getattr(client, self.method)(self.url, data=self.data)
+
+
+def benchmark_user():
+    user, _ = CustomUser.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={
+            'email': f'{BENCHMARK_USERNAME}@yamdb.fake',
+            'role': USER_ROLE_ADMIN,
+        },
+    )
+    return user
+
+
+def benchmark_client(user):
+    """
+    Клиент с настоящим JWT токеном: аутентификация и права доступа
+    входят в замер, кэш ответов для анонимов — нет.
+    """
+    client = APIClient(HTTP_HOST=BENCHMARK_HOST)
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+def url_kwargs():
+    """Параметры URL: самое «горячее» произведение и отзыв к нему."""
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comment_count=Count('comments')
+    ).order_by('-comment_count', 'pk').first() if title else None
+    comment = Comment.objects.filter(review=review).first() if review else None
+    user = CustomUser.objects.exclude(username=BENCHMARK_USERNAME).first()
+    return {
+        'users': {'username': user.username} if user else None,
+        'categories': {'slug': title.category.slug}
+        if title and title.category else None,
+        'genres': {'slug': title.genre.first().slug}
+        if title and title.genre.exists() else None,
+        'titles': {'pk': title.pk} if title else None,
+        'reviews': {'title_id': title.pk, 'pk': review.pk}
+        if review else None,
+        'comments': {'title_id': title.pk, 'review_id': review.pk,
+                     'pk': comment.pk} if comment else None,
+    }
+
+
+def build_scenarios(user):
+    """GET сценарии для всех маршрутов роутера и запись отзыва."""
+    kwargs = url_kwargs()
+    scenarios = []
+    for _, viewset, basename in router_v1.registry:
+        detail_kwargs = kwargs.get(basename)
+        for route in router_v1.get_routes(viewset):
+            mapping = router_v1.get_method_map(viewset, route.mapping)
+            if 'get' not in mapping:
+                continue
+            name = route.name.format(basename=basename)
+            if route.detail:
+                if detail_kwargs is None:
+                    continue
+                url_params = detail_kwargs
+            else:
+                url_params = {
+                    key: value for key, value in (detail_kwargs or {}).items()
+                    if key.endswith('_id')
+                }
+            scenarios.append(
+                Scenario(name, 'get', reverse(name, kwargs=url_params))
+            )
+    if kwargs['titles'] is not None:
+        scenarios.append(review_create_scenario(user, kwargs['titles']))
+    return scenarios
+
+
+def review_create_scenario(user, title_kwargs):
+    """Запись отзыва к «горячему» произведению, отзыв удаляется после."""
+    score = 7
+
+    def cleanup(response):
+        deleted, _ = Review.objects.filter(
+            title_id=title_kwargs['pk'], author=user
+        ).delete()
+        if deleted:
+            Title.objects.filter(pk=title_kwargs['pk']).update_rating(
+                -score, -1
+            )
+
+    return Scenario(
+        'reviews-create', 'post',
+        reverse('reviews-list', kwargs={'title_id': title_kwargs['pk']}),
+        data={'text': 'Отзыв из бенчмарка', 'score': score},
+        cleanup=cleanup,
+    )
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timed_request(client, scenario):
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    # Запросы считаются на всех БД: чтения могут уйти в реплики.
+    with execute_wrapper_all(count_query):
+        started = time.perf_counter()
+        response = scenario.request(client)
+        elapsed = (time.perf_counter() - started) * 1000
+    if scenario.cleanup is not None:
+        scenario.cleanup(response)
+    return response, elapsed, queries
+
+
+def run_scenario(client, scenario, iterations, warmup):
+    # История троттлинга сбрасывается, чтобы длинный прогон
+    # не упёрся в дневной лимит пользователя.
+    throttle_store().clear()
+    for _ in range(warmup):
+        timed_request(client, scenario)
+    latencies = []
+    queries = []
+    for _ in range(iterations):
+        response, elapsed, count = timed_request(client, scenario)
+        latencies.append(elapsed)
+        queries.append(count)
+
+    tracemalloc.start()
+    try:
+        timed_request(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'queries': max(queries),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'memory_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(iterations, warmup, only=None):
+    """Прогоняет сценарии и возвращает результаты по именам маршрутов."""
+    user = benchmark_user()
+    client = benchmark_client(user)
+    results = {}
+    for scenario in build_scenarios(user):
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(
+            client, scenario, iterations, warmup
+        )
+    return results
+
+
+def row_scenarios():
+    """
+    Выборки для замера сериализации: queryset обычного list,
+    сериализатор DRF и сериализатор строк values().
+    """
+    return {
+        'titles': (
+            Title.objects.select_related('category').prefetch_related(
+                'genre'
+            ),
+            TitleReadSerializer, TitleRowSerializer,
+        ),
+        'genres': (Genre.objects.all(), GenreSerializer, GenreRowSerializer),
+        'reviews': (
+            Review.objects.select_related('author'),
+            ReviewSerializer, ReviewRowSerializer,
+        ),
+        'comments': (
+            Comment.objects.select_related('author'),
+            CommentSerializer, CommentRowSerializer,
+        ),
+    }
+
+
+def serialize_models(queryset, serializer_class):
+    return serializer_class(list(queryset), many=True).data
+
+
+def serialize_rows(queryset, row_serializer_class):
+    row_serializer = row_serializer_class()
+    return row_serializer.to_representation(row_serializer.get_rows(queryset))
+
+
+def rows_per_second(serialize, queryset, serializer_class, iterations):
+    """Строк в секунду по лучшему из iterations прогонов, с чтением из БД."""
+    best = None
+    rows = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        rows = len(serialize(queryset.all(), serializer_class))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(rows / best) if rows else 0, rows
+
+
+def run_row_benchmarks(iterations):
+    """
+    Скорость сериализации списков, строк в секунду: обычные
+    сериализаторы DRF против строк values() (api/fastread.py).
+    """
+    results = {}
+    for name, (queryset, serializer_class, row_serializer_class) in (
+        row_scenarios().items()
+    ):
+        queryset = queryset[:ROW_BENCHMARK_LIMIT]
+        drf, rows = rows_per_second(
+            serialize_models, queryset, serializer_class, iterations
+        )
+        fast, _ = rows_per_second(
+            serialize_rows, queryset, row_serializer_class, iterations
+        )
+        results[name] = {
+            'rows': rows, 'drf_rows_s': drf, 'fast_rows_s': fast,
+            'speedup': round(fast / drf, 2) if drf else 0,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Возвращает список регрессий относительно базовой линии.
+    Статус и число запросов сравниваются строго, время и память —
+    с допуском tolerance (доля от базового значения), но не меньше
+    MIN_DELTA, чтобы шум быстрых запросов не считался регрессией.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(
+                f'{name}: статус {result["status"]} вместо {base["status"]}'
+            )
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {result["queries"]} '
+                f'> {base["queries"]}'
+            )
+        for metric in ('p50_ms', 'p99_ms', 'memory_kib'):
+            limit = max(
+                base[metric] * (1 + tolerance),
+                base[metric] + MIN_DELTA[metric],
+            )
+            if result[metric] > limit:
+                regressions.append(
+                    f'{name}: {metric} {result[metric]} > {limit:.1f} '
+                    f'(база {base[metric]})'
+                )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(path, results, dataset):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'dataset': dataset, 'results': results},
+            f, ensure_ascii=False, indent=2, sort_keys=True,
+        )
+        f.write('\n')
@@ -0,0 +1,185 @@
+"""
+Массовая запись произведений: POST /api/v1/titles/bulk/.
+
+Тело — JSON массив или NDJSON. Элемент без id создаёт произведение,
+с id — частично обновляет существующее. Слаги жанров и категорий всех
+элементов читаются один раз на пачку, каждый элемент проверяется
+TitleWriteSerializer, а прошедшие проверку записываются в одной
+транзакции: bulk_insert для новых, bulk_update для изменённых и одна
+синхронизация жанров. Ошибки проверки возвращаются по элементам и не
+мешают записи остальных.
+
+Изменяемые произведения читаются в той же транзакции после блокировки
+записи, а bulk_update пишет только поля, переданные в элементах:
+иначе пачка вернула бы старые значения полей, изменённые параллельным
+запросом.
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from reviews.models import SQL_CHUNK_SIZE, Category, Genre, GenreTitle, Title
+from reviews.sqlite import lock_for_write
+
+from .cache import invalidate_on_commit
+from .serializers import TitleWriteSerializer
+
+TITLE_FIELDS = ('name', 'year', 'description', 'category')
+
+
+def collect_slugs(items, field):
+    slugs = set()
+    for item in items:
+        value = item.get(field) if isinstance(item, dict) else None
+        if isinstance(value, str):
+            slugs.add(value)
+        elif isinstance(value, list):
+            slugs.update(slug for slug in value if isinstance(slug, str))
+    return slugs
+
+
+def load_by_slug(model, slugs):
+    slugs = list(slugs)
+    objects = {}
+    for start in range(0, len(slugs), SQL_CHUNK_SIZE):
+        objects.update(model.objects.in_bulk(
+            slugs[start:start + SQL_CHUNK_SIZE], field_name='slug'
+        ))
+    return objects
+
+
+def load_titles(items):
+    ids = [
+        item['id'] for item in items
+        if isinstance(item, dict) and isinstance(item.get('id'), int)
+    ]
+    titles = {}
+    queryset = Title.objects.select_for_update()
+    for start in range(0, len(ids), SQL_CHUNK_SIZE):
+        titles.update(queryset.in_bulk(ids[start:start + SQL_CHUNK_SIZE]))
+    return titles
+
+
+class TitleBulkWriter:
+
+    def __init__(self, items, context):
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'detail': 'Ожидается JSON массив или NDJSON произведений.'}
+            )
+        if len(items) > settings.TITLE_BULK_MAX_ITEMS:
+            raise ValidationError({'detail': (
+                'Не больше {} произведений за запрос.'.format(
+                    settings.TITLE_BULK_MAX_ITEMS
+                )
+            )})
+        self.items = items
+        self.context = {
+            **context,
+            'preloaded_slugs': {
+                Genre: load_by_slug(Genre, collect_slugs(items, 'genre')),
+                Category: load_by_slug(
+                    Category, collect_slugs(items, 'category')
+                ),
+            },
+        }
+        self.titles = {}
+        self.results = [None] * len(items)
+
+    def validate(self, index, item):
+        """Проверенный сериализатор элемента или None с ошибкой в results."""
+        instance = None
+        if isinstance(item, dict) and 'id' in item:
+            instance = self.titles.get(item['id'])
+            if instance is None:
+                self.results[index] = {
+                    'index': index,
+                    'status': status.HTTP_404_NOT_FOUND,
+                    'errors': {'id': ['Произведение не найдено.']},
+                }
+                return None
+        serializer = TitleWriteSerializer(
+            instance, data=item, partial=instance is not None,
+            context=self.context,
+        )
+        if not serializer.is_valid():
+            self.results[index] = {
+                'index': index,
+                'status': status.HTTP_400_BAD_REQUEST,
+                'errors': serializer.errors,
+            }
+            return None
+        return serializer
+
+    def save(self):
+        with transaction.atomic():
+            lock_for_write(Title)
+            self.titles = load_titles(self.items)
+            created, updated, genres = self.apply()
+            Title.objects.bulk_insert(title for _, title in created)
+            by_fields = {}
+            for index, title in updated:
+                fields = tuple(
+                    field for field in TITLE_FIELDS
+                    if field in self.items[index]
+                )
+                if fields:
+                    by_fields.setdefault(fields, []).append(title)
+            for fields, titles in by_fields.items():
+                Title.objects.bulk_update(
+                    titles, fields, batch_size=SQL_CHUNK_SIZE
+                )
+            titles = dict(created + updated)
+            GenreTitle.objects.sync({
+                titles[index].pk: genre_ids
+                for index, genre_ids in genres.items()
+            })
+            invalidate_on_commit((
+                'titles', *(f'title:{title.pk}' for title in titles.values())
+            ))
+        for index, title in created:
+            self.results[index] = {
+                'index': index, 'status': status.HTTP_201_CREATED,
+                'id': title.pk,
+            }
+        for index, title in updated:
+            self.results[index] = {
+                'index': index, 'status': status.HTTP_200_OK, 'id': title.pk,
+            }
+        return self.results
+
+    def apply(self):
+        """
+        Проверяет элементы и переносит данные в объекты: новые
+        и изменённые произведения [(индекс, объект)] и жанры по индексам.
+        """
+        created, updated, genres = [], [], {}
+        for index, item in enumerate(self.items):
+            serializer = self.validate(index, item)
+            if serializer is None:
+                continue
+            data = dict(serializer.validated_data)
+            title_genres = data.pop('genre', None)
+            title = serializer.instance or Title()
+            for field, value in data.items():
+                setattr(title, field, value)
+            (updated if title.pk else created).append((index, title))
+            if title_genres is not None:
+                genres[index] = [genre.pk for genre in title_genres]
+        return created, updated, genres
+
+    def response_status(self):
+        """
+        201/200 — все элементы записаны, 400 — ни один,
+        207 Multi-Status — часть элементов с ошибками.
+        """
+        statuses = {result['status'] for result in self.results}
+        failed = any(code >= 400 for code in statuses)
+        if not failed:
+            if status.HTTP_201_CREATED in statuses:
+                return status.HTTP_201_CREATED
+            return status.HTTP_200_OK
+        if all(code >= 400 for code in statuses):
+            return status.HTTP_400_BAD_REQUEST
+        return status.HTTP_207_MULTI_STATUS
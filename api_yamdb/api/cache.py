@@ -0,0 +1,223 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import registry as metrics
+from .sql import skip_in_call_sites
+
+VERSION_KEY_PREFIX = 'version'
+RESPONSE_KEY_PREFIX = 'response'
+# Миксины кэша только оборачивают обработчики представлений.
+skip_in_call_sites(__file__)
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(scopes):
+    """
+    Возвращает версии областей данных (scope).
+    Версия — отметка времени последней записи в области; отсутствующая
+    в кэше версия заводится заново текущим временем, поэтому вытеснение
+    версии из кэша никогда не возвращает старые ключи.
+    """
+    cache = get_cache()
+    keys = {scope: f'{VERSION_KEY_PREFIX}:{scope}' for scope in scopes}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        if key not in stored:
+            cache.add(key, time.time_ns(), timeout=None)
+            stored[key] = cache.get(key)
+        versions[scope] = stored[key]
+    return versions
+
+
+def bump_versions(scopes):
+    """
+    Сдвигает версии областей, делая устаревшими все ответы по ним.
+    Версии удаляются, а не перезаписываются: get_versions() заведёт
+    новые при следующем чтении. Удаление дешевле записи — FileBasedCache
+    при каждой записи просматривает весь каталог кэша, и массовая запись
+    на тысячу произведений сдвигала бы версии секундами.
+    """
+    get_cache().delete_many(
+        [f'{VERSION_KEY_PREFIX}:{scope}' for scope in scopes]
+    )
+
+
+def invalidate_on_commit(scopes):
+    """
+    Сдвигает версии после фиксации транзакции, чтобы параллельный
+    читатель не закэшировал под новой версией ещё старые данные.
+    """
+    scopes = tuple(scopes)
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+def invalidate_all():
+    """Сбрасывает все ответы сразу, например после массовой загрузки."""
+    bump_versions(('global',))
+
+
+def normalize_query(query_params):
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(query_params)
+        for value in sorted(query_params.getlist(key))
+    )
+
+
+def request_digest(request, versions, *parts):
+    """Хэш пути, нормализованных параметров запроса и версий областей."""
+    raw = '|'.join((
+        request.path,
+        normalize_query(request.query_params),
+        *parts,
+        *(f'{scope}={versions[scope]}' for scope in sorted(versions)),
+    ))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def response_cache_key(request, versions):
+    return f'{RESPONSE_KEY_PREFIX}:{request_digest(request, versions)}'
+
+
+def etag_tags(header):
+    return [tag.strip() for tag in header.split(',')] if header else []
+
+
+def matches_etag(header, etag):
+    tags = etag_tags(header)
+    return '*' in tags or etag in tags
+
+
+class VersionedViewMixin:
+    """
+    Базовый миксин для вьюсетов, ответы которых зависят от версий
+    областей данных из get_cache_scopes().
+    """
+
+    def get_cache_scopes(self):
+        raise NotImplementedError(
+            f'{self.__class__.__name__} требует реализации '
+            'get_cache_scopes().'
+        )
+
+    def get_scope_versions(self):
+        if getattr(self, '_scope_versions', None) is None:
+            self._scope_versions = get_versions(
+                ('global', *self.get_cache_scopes())
+            )
+        return self._scope_versions
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """
+    Условные GET запросы для list, вьюсеты с retrieve оборачивают его
+    в conditional_response() сами.
+    ETag и Last-Modified вычисляются из версий областей данных в общем
+    кэше, поэтому ответ 304 не требует сериализации, а запросы к БД
+    нужны только для проверки родительского объекта.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_validators(self, request):
+        versions = self.get_scope_versions()
+        etag = '"{}"'.format(request_digest(
+            request, versions, request.accepted_renderer.format
+        ))
+        last_modified = max(versions.values()) // 10 ** 9
+        return etag, last_modified
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            return matches_etag(if_none_match, etag)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
+
+    def check_parent_exists(self):
+        """
+        Вызывается перед ответом 304. Вложенные вьюсеты проверяют, что
+        родительский объект из URL существует, иначе ответ — 404.
+        """
+
+    def check_object_exists(self, request):
+        """
+        `If-None-Match: *` совпадает с любым ETag, а ETag карточки
+        вычисляется без чтения объекта: перед ответом 304 проверяется,
+        что объект существует, иначе ответ — 404.
+        """
+        if not getattr(self, 'detail', False):
+            return
+        if '*' not in etag_tags(request.META.get('HTTP_IF_NONE_MATCH')):
+            return
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            exists = self.get_queryset().filter(**lookup).exists()
+        except (TypeError, ValueError):
+            exists = False
+        if not exists:
+            raise Http404
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        headers = {'ETag': etag, 'Last-Modified': http_date(last_modified)}
+        if self.is_not_modified(request, etag, last_modified):
+            self.check_parent_exists()
+            self.check_object_exists(request)
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+
+class ResponseCacheMixin(VersionedViewMixin):
+    """
+    Кэширует ответы list для анонимных пользователей, вьюсеты с retrieve
+    оборачивают его в cached_response() сами.
+    Ключ строится из пути, нормализованных параметров запроса и версий
+    областей данных из get_cache_scopes(); запись в модели сдвигает
+    версии через сигналы (см. api/signals.py).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_cache_key(request, self.get_scope_versions())
+        data = cache.get(key)
+        if data is not None:
+            metrics.observe_cache(self.basename, hit=True)
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            metrics.observe_cache(self.basename, hit=False)
+            response['X-Cache'] = 'MISS'
+        return response
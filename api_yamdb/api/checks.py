@@ -0,0 +1,38 @@
+"""
+Проверки настроек при запуске (manage.py check, runserver, migrate).
+
+Кэши, через которые воркеры согласуют состояние (версии областей и
+ответы, пользователи JWT, отметки записи для реплик), должны быть
+общими для всех процессов: LocMemCache у каждого процесса свой, и
+запись, обработанная одним воркером, не сбрасывала бы кэш остальных.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Настройки с именами кэшей, которые должны быть общими.
+SHARED_CACHE_SETTINGS = (
+    'RESPONSE_CACHE_ALIAS',
+    'JWT_USER_CACHE_ALIAS',
+    'REPLICA_STICKY_CACHE_ALIAS',
+)
+
+
+@register('caches')
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name)
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_CACHES:
+            errors.append(Error(
+                f'{name}={alias!r} использует {backend}: кэш должен быть '
+                'общим для всех процессов сервера.',
+                hint='Укажите общий бэкенд в CACHE_BACKEND, например '
+                     'FileBasedCache, DatabaseCache или Redis.',
+                id='api.E001',
+            ))
+    return errors
@@ -0,0 +1,193 @@
+"""
+Быстрое чтение списков: страница читается строками values(), а ответ
+собирается из них без моделей и без полей DRF на каждую строку.
+
+RowSerializer повторяет вывод обычного сериализатора (serializer_class):
+набор и порядок полей берутся из него, строки и числа копируются как
+есть, остальные значения (даты) проходят через to_representation()
+того же поля DRF, созданного один раз на запрос. Вложенные объекты и
+поля-методы собираются методами get_<поле>(row), связанные списки
+(жанры произведений) читаются одним запросом на страницу в
+load_related(). Совпадение вывода с обычными сериализаторами
+проверяется тестами поле за полем.
+"""
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
+from rest_framework.response import Response
+
+from reviews.models import SQL_CHUNK_SIZE, GenreTitle
+
+from .profiling import request_phase
+from .serializers import (CategorySerializer, CommentSerializer,
+                          GenreSerializer, ReviewSerializer,
+                          TitleReadSerializer)
+
+# Поля, значение которых в строке values() уже совпадает с выводом DRF.
+RAW_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    PrimaryKeyRelatedField,
+    SlugRelatedField,
+)
+
+
+class RowSerializer:
+    """
+    Сериализатор строк values() для list.
+    fields — имена полей вывода (None — все поля serializer_class).
+    """
+    serializer_class = None
+    # Поле вывода → колонки values(), если они не выводятся из поля DRF.
+    columns = {}
+
+    def __init__(self, fields=None):
+        self.column_names = []
+        self.getters = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            columns = self.get_field_columns(name, field)
+            self.column_names.extend(columns)
+            self.getters.append(
+                (name, self.build_getter(name, field, columns))
+            )
+
+    @property
+    def field_names(self):
+        return [name for name, _ in self.getters]
+
+    def get_field_columns(self, name, field):
+        if name in self.columns:
+            return self.columns[name]
+        if isinstance(field, SlugRelatedField):
+            return (f'{field.source}__{field.slug_field}',)
+        return (field.source,)
+
+    def build_getter(self, name, field, columns):
+        method = getattr(self, f'get_{name}', None)
+        if method is not None:
+            return method
+        if isinstance(field, (
+            serializers.BaseSerializer, serializers.SerializerMethodField,
+            serializers.ManyRelatedField,
+        )):
+            raise ImproperlyConfigured(
+                f'{self.__class__.__name__} требует метода get_{name}().'
+            )
+        get_value = itemgetter(columns[0])
+        if isinstance(field, RAW_FIELDS):
+            return get_value
+
+        def getter(row):
+            value = get_value(row)
+            return None if value is None else field.to_representation(value)
+        return getter
+
+    def get_rows(self, queryset, extra_columns=()):
+        """
+        Ленивый queryset строк values() с колонками полей вывода
+        и extra_columns (колонки сортировки для курсора).
+        """
+        columns = dict.fromkeys((*self.column_names, *extra_columns))
+        return queryset.prefetch_related(None).values(*columns)
+
+    def load_related(self, rows):
+        """Читает связанные списки для строк страницы."""
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.load_related(rows)
+        getters = self.getters
+        return [{name: getter(row) for name, getter in getters}
+                for row in rows]
+
+
+class CategoryRowSerializer(RowSerializer):
+    serializer_class = CategorySerializer
+
+
+class GenreRowSerializer(RowSerializer):
+    serializer_class = GenreSerializer
+
+
+class TitleRowSerializer(RowSerializer):
+    serializer_class = TitleReadSerializer
+    columns = {
+        'rating': ('score_sum', 'review_count'),
+        'genre': ('id',),
+        'category': ('category__name', 'category__slug'),
+    }
+
+    def load_related(self, rows):
+        self.genres = {}
+        if 'genre' not in self.field_names:
+            return
+        ids = [row['id'] for row in rows]
+        for start in range(0, len(ids), SQL_CHUNK_SIZE):
+            links = GenreTitle.objects.filter(
+                title_id__in=ids[start:start + SQL_CHUNK_SIZE],
+                genre__isnull=False,
+            ).order_by('genre__name').values_list(
+                'title_id', 'genre__name', 'genre__slug'
+            )
+            for title_id, name, slug in links:
+                self.genres.setdefault(title_id, []).append(
+                    {'name': name, 'slug': slug}
+                )
+
+    @staticmethod
+    def get_rating(row):
+        """Та же формула, что и у Title.rating."""
+        if not row['review_count']:
+            return None
+        return round(row['score_sum'] / row['review_count'])
+
+    def get_genre(self, row):
+        return self.genres.get(row['id'], [])
+
+    @staticmethod
+    def get_category(row):
+        if row['category__slug'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
+
+
+class ReviewRowSerializer(RowSerializer):
+    serializer_class = ReviewSerializer
+
+
+class CommentRowSerializer(RowSerializer):
+    serializer_class = CommentSerializer
+
+
+class FastListMixin:
+    """
+    list через row_serializer_class вместо get_serializer(): фильтры,
+    пагинация (в том числе курсорная) и `?fields=` работают как обычно,
+    но страница читается строками values().
+    Используется вместе с SparseFieldsetMixin. Выключается настройкой
+    FAST_READ_LISTS.
+    """
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None or not settings.FAST_READ_LISTS:
+            return super().list(request, *args, **kwargs)
+        row_serializer = self.row_serializer_class(self.get_sparse_fields())
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = row_serializer.get_rows(
+            queryset, self.get_protected_columns(queryset)
+        )
+        page = self.paginate_queryset(rows)
+        with request_phase(request, 'serialize'):
+            data = row_serializer.to_representation(
+                rows if page is None else page
+            )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
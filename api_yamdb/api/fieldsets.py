@@ -0,0 +1,120 @@
+"""
+Выборочные поля ответа: `?fields=id,name` или `?exclude=description`.
+
+SparseFieldsetMixin убирает из сериализатора незапрошенные поля, а из
+запроса к БД — их колонки через defer(), поэтому большие текстовые
+колонки не читаются, а поля-методы (например, rating) не вычисляются.
+Связанные объекты вьюсет подключает в get_queryset() только при
+is_field_requested(). Колонки сортировки и пагинации не откладываются:
+обращение к отложенной колонке стоило бы запроса на каждую строку.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsetMixin:
+    fields_param = 'fields'
+    exclude_param = 'exclude'
+    # Поля вывода, которые читают колонки модели не из своего source.
+    sparse_field_columns = {}
+
+    def get_readable_fields(self):
+        if not hasattr(self, '_readable_fields'):
+            serializer = self.get_serializer_class()(
+                context=self.get_serializer_context()
+            )
+            self._readable_fields = {
+                name: field for name, field in serializer.fields.items()
+                if not field.write_only
+            }
+        return self._readable_fields
+
+    def get_sparse_fields(self):
+        """
+        Имена запрошенных полей или None, если ответ полный.
+        Выборка действует только для безопасных методов.
+        """
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        self._sparse_fields = None
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            self.fields_param in params or self.exclude_param in params
+        ):
+            return None
+        readable = self.get_readable_fields()
+        requested = {}
+        for param in (self.fields_param, self.exclude_param):
+            names = [
+                name.strip() for name in params.get(param, '').split(',')
+                if name.strip()
+            ]
+            unknown = sorted(set(names) - set(readable))
+            if unknown:
+                raise ValidationError(
+                    {param: f'Неизвестные поля: {", ".join(unknown)}'}
+                )
+            requested[param] = names
+        fields = set(requested[self.fields_param] or readable)
+        self._sparse_fields = fields - set(requested[self.exclude_param])
+        return self._sparse_fields
+
+    def is_field_requested(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in [
+                name for name, field in target.fields.items()
+                if name not in fields and not field.write_only
+            ]:
+                target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        return self.defer_unused_columns(super().filter_queryset(queryset))
+
+    def defer_unused_columns(self, queryset):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = set()
+        for name, field in self.get_readable_fields().items():
+            if name not in fields:
+                columns.update(self.get_field_columns(name, field))
+        columns -= self.get_protected_columns(queryset)
+        return queryset.defer(*sorted(columns)) if columns else queryset
+
+    def get_field_columns(self, name, field):
+        """Колонки модели, которые читает поле вывода и можно отложить."""
+        if name in self.sparse_field_columns:
+            return self.sparse_field_columns[name]
+        if len(getattr(field, 'source_attrs', ())) != 1:
+            return ()
+        model = self.get_serializer_class().Meta.model
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return ()
+        if (
+            not model_field.concrete or model_field.primary_key
+            or model_field.is_relation
+        ):
+            return ()
+        return (model_field.name,)
+
+    def get_protected_columns(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        cursor_class = getattr(
+            self.paginator, 'cursor_pagination_class', None
+        )
+        if cursor_class is not None:
+            ordering.extend(cursor_class.ordering)
+        return {order.lstrip('-') for order in ordering}
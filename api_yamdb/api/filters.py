@@ -1,6 +1,8 @@
 from django_filters import CharFilter, FilterSet
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.search import full_text_search
 
 
 class TitleFilterBackend(FilterSet):
@@ -16,3 +18,18 @@ class TitleFilterBackend(FilterSet):
     class Meta:
         model = Title
         fields = ('genre', 'category', 'name', 'year')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по параметру `?q=`.
+    Использует FTS5 индекс модели, результаты сортируются по релевантности.
+    """
+
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return full_text_search(queryset, query)
@@ -0,0 +1,145 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from api.benchmarks import (compare, load_baseline, run_benchmarks,
+                            run_row_benchmarks, save_baseline)
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks',
+                                'baseline.json')
+# Набор данных базовой линии: при его изменении базу нужно обновить.
+DATASET = {
+    'users': 300,
+    'categories': 10,
+    'genres': 30,
+    'titles': 500,
+    'reviews': 5000,
+    'comments': 3000,
+    'seed': 'benchmark',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет эндпоинты роутера API на сгенерированных данных, '
+        'замеряет число запросов к БД, p50/p99 времени ответа и память '
+        'и сравнивает результат с базовой линией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Допустимый рост времени и памяти, доля от базы.',
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результат как новую базовую линию.',
+        )
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='Использовать текущую БД вместо временной тестовой '
+                 'с сгенерированными данными.',
+        )
+        parser.add_argument(
+            '--only', nargs='+', help='Имена маршрутов, например titles-list.',
+        )
+        parser.add_argument(
+            '--rows', action='store_true',
+            help='Замерить скорость сериализации списков (строк в секунду) '
+                 'вместо маршрутов, без сравнения с базовой линией.',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError('Неверное число итераций.')
+        if options['current_db']:
+            results = self.run(options)
+        else:
+            results = self.run_on_test_db(options)
+        if options['rows']:
+            self.print_row_results(results)
+            return
+        self.print_results(results)
+
+        if options['update_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            save_baseline(options['baseline'], results, DATASET)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовая линия записана: {options["baseline"]}'
+            ))
+            return
+        if not os.path.exists(options['baseline']):
+            raise CommandError(
+                f'Нет базовой линии {options["baseline"]}, '
+                'запустите с --update-baseline.'
+            )
+        regressions = compare(
+            results, load_baseline(options['baseline']),
+            options['tolerance'],
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
+
+    def run(self, options):
+        if options['rows']:
+            return run_row_benchmarks(options['iterations'])
+        return run_benchmarks(
+            options['iterations'], options['warmup'], options['only']
+        )
+
+    def run_on_test_db(self, options):
+        """
+        Прогон на временной БД с данными generate_data. Реплики из
+        REPLICA_DATABASES (TEST MIRROR) становятся зеркалами временной
+        БД, поэтому чтения через маршрутизатор видят те же данные.
+        """
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=False
+        )
+        if settings.REPLICA_DATABASES:
+            self.stdout.write(
+                'Реплики — зеркала временной БД: '
+                + ', '.join(settings.REPLICA_DATABASES)
+            )
+        try:
+            call_command(
+                'generate_data',
+                *(f'--{key}={value}' for key, value in DATASET.items()),
+                stdout=io.StringIO(),
+            )
+            return self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def print_results(self, results):
+        self.stdout.write(
+            f'{"маршрут":<20} {"статус":>6} {"запросы":>8} '
+            f'{"p50 мс":>9} {"p99 мс":>9} {"память КиБ":>11}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<20} {result["status"]:>6} {result["queries"]:>8} '
+                f'{result["p50_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+                f'{result["memory_kib"]:>11.1f}'
+            )
+
+    def print_row_results(self, results):
+        self.stdout.write(
+            f'{"список":<10} {"строк":>6} {"DRF строк/с":>12} '
+            f'{"values() строк/с":>17} {"ускорение":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<10} {result["rows"]:>6} {result["drf_rows_s"]:>12} '
+                f'{result["fast_rows_s"]:>17} {result["speedup"]:>10.2f}'
+            )
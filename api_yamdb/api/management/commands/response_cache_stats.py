@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.metrics import response_cache_stats
+
+CACHED_RESOURCES = ('titles', 'genres', 'categories')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит счётчики попаданий и промахов кэша ответов API '
+        'из снимков метрик процессов в METRICS_DIR.'
+    )
+
+    def handle(self, *args, **options):
+        for resource, stats in response_cache_stats(CACHED_RESOURCES).items():
+            total = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / total if total else 0
+            self.stdout.write(
+                f'{resource}: hits={stats["hits"]} '
+                f'misses={stats["misses"]} ratio={ratio:.2f}'
+            )
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди email_outbox пачками через одно '
+        'соединение почтового бэкенда, с повторами и задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+        )
+
+    def handle(self, *args, **options):
+        sender = OutboxSender(options['batch_size'])
+        try:
+            while True:
+                count = sender.send_pending()
+                if not options['loop']:
+                    break
+                if not count:
+                    # Пока очередь пуста, соединение с SMTP не держим.
+                    sender.close()
+                    close_old_connections()
+                    time.sleep(options['interval'])
+        finally:
+            sender.close()
+        self.stdout.write(
+            f'Отправлено писем: {sender.sent}, с ошибкой: {sender.failed}'
+        )
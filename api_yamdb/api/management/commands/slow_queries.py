@@ -0,0 +1,59 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.slowlog import aggregate, read_entries
+
+SORT_KEYS = {
+    'total': lambda stats: stats['total_ms'],
+    'max': lambda stats: stats['max_ms'],
+    'count': lambda stats: stats['count'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит отчёт по журналу медленных SQL запросов: самые дорогие '
+        'отпечатки запросов с числом вызовов, временем и планом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=tuple(SORT_KEYS), default='total',
+        )
+        parser.add_argument('--log', default=None)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить журнал после вывода отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        if not os.path.exists(path):
+            self.stdout.write('Журнал медленных запросов пуст.')
+            return
+        report = sorted(
+            aggregate(read_entries(path)),
+            key=SORT_KEYS[options['sort']],
+            reverse=True,
+        )
+        for number, stats in enumerate(report[:options['top']], start=1):
+            self.print_stats(number, stats)
+        if options['clear']:
+            os.remove(path)
+
+    def print_stats(self, number, stats):
+        worst = stats['worst']
+        self.stdout.write(self.style.WARNING(
+            f'#{number} count={stats["count"]} '
+            f'total={stats["total_ms"]:.1f}ms max={stats["max_ms"]:.1f}ms '
+            f'avg={stats["total_ms"] / stats["count"]:.1f}ms'
+        ))
+        self.stdout.write(f'  {stats["fingerprint"]}')
+        self.stdout.write(f'  место вызова: {worst["call_site"]}')
+        if worst['params']:
+            self.stdout.write(f'  параметры: {", ".join(worst["params"])}')
+        for line in stats['plan'] or ():
+            self.stdout.write(f'  план: {line}')
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.cache import invalidate_all
+
+# backup за один шаг: при пошаговом копировании каждая запись в основную
+# БД с другого соединения начинает копию заново, и под постоянной
+# нагрузкой она не завершалась бы. В WAL режиме шаг не блокирует запись.
+BACKUP_PAGES = -1
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную БД SQLite в реплики REPLICA_DATABASES '
+        'через backup API и сбрасывает кэш ответов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять синхронизацию каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не настроены (DB_REPLICAS).')
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('sync_replicas поддерживает только SQLite.')
+        while True:
+            self.sync(source)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self, source):
+        started = time.monotonic()
+        source.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            self.replace_replica(
+                source, connections[alias].settings_dict['NAME']
+            )
+        # Кэш мог сохранить ответы, прочитанные из отстающей реплики.
+        invalidate_all()
+        self.stdout.write(
+            f'Реплики обновлены: {", ".join(settings.REPLICA_DATABASES)} '
+            f'за {time.monotonic() - started:.2f} с'
+        )
+
+    @staticmethod
+    def replace_replica(source, path):
+        """
+        Копирует основную БД во временный файл рядом с репликой и
+        атомарно подменяет им реплику: читатели не видят файл в процессе
+        копирования, открытые соединения дочитывают прежнюю копию.
+        Копия переводится в режим журнала DELETE, так как файлы -wal и
+        -shm общие по имени для старой и новой реплики.
+        """
+        temp_path = f'{path}.sync'
+        for leftover in (temp_path, f'{temp_path}-journal'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.connection.backup(target, pages=BACKUP_PAGES)
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+        os.replace(temp_path, path)
@@ -0,0 +1,357 @@
+"""
+Метрики запросов в формате Prometheus.
+
+MetricsMiddleware считает в памяти процесса запросы по имени маршрута
+(url name), методу и статусу, гистограмму времени ответа и число SQL
+запросов; кэш ответов добавляет попадания и промахи. Запись — пара
+операций со словарём под блокировкой.
+
+При нескольких процессах (gunicorn) каждый процесс не чаще раза
+в METRICS_FLUSH_INTERVAL секунд сохраняет снимок своих счётчиков
+в METRICS_DIR/metrics-<pid>-<uuid>.json, а /metrics/ суммирует снимки
+всех процессов. uuid в имени не даёт новому процессу с тем же pid
+перезаписать снимок завершившегося. Снимки завершившихся процессов
+прибавляются к общему итогу metrics-retired.json и удаляются, чтобы
+счётчики не уменьшались, а каталог не рос; каталог очищается при
+перезапуске сервиса.
+
+/metrics/ доступен с METRICS_ALLOWED_IPS, а если задан METRICS_TOKEN —
+только с заголовком Authorization: Bearer <METRICS_TOKEN>.
+"""
+import fcntl
+import glob
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from .sql import execute_wrapper_all, skip_in_call_sites
+
+# Границы гистограммы времени ответа, секунды.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+KEY_SEPARATOR = '\t'
+UNMATCHED_ROUTE = 'unmatched'
+METRICS_ROUTE = 'metrics'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SNAPSHOT_PATTERN = 'metrics-*-*.json'
+RETIRED_FILE = 'metrics-retired.json'
+LOCK_FILE = 'metrics.lock'
+
+skip_in_call_sites(__file__)
+
+
+def empty_snapshot():
+    return {
+        'requests': defaultdict(int),
+        'latency': {},
+        'queries': defaultdict(int),
+        'cache': defaultdict(int),
+    }
+
+
+class MetricsRegistry:
+    """Счётчики текущего процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = empty_snapshot()
+        self.flushed = 0
+        self.pid = None
+        self.name = None
+
+    def snapshot_name(self):
+        """Имя снимка процесса, новое после fork."""
+        pid = os.getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.name = f'metrics-{pid}-{uuid.uuid4().hex}.json'
+        return self.name
+
+    def observe_request(self, route, method, status, duration, queries):
+        key = KEY_SEPARATOR.join((route, method))
+        bucket = next(
+            (index for index, bound in enumerate(LATENCY_BUCKETS)
+             if duration <= bound),
+            len(LATENCY_BUCKETS),
+        )
+        with self.lock:
+            self.data['requests'][
+                KEY_SEPARATOR.join((route, method, str(status)))
+            ] += 1
+            # Счётчики корзин (не накопленные), затем сумма и число.
+            latency = self.data['latency'].setdefault(
+                key, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            )
+            latency[bucket] += 1
+            latency[-2] += duration
+            latency[-1] += 1
+            self.data['queries'][key] += queries
+
+    def observe_cache(self, resource, hit):
+        with self.lock:
+            self.data['cache'][
+                KEY_SEPARATOR.join((resource, 'hit' if hit else 'miss'))
+            ] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.data))
+
+    def flush(self, force=False):
+        """Сохраняет снимок процесса для сбора из других процессов."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+            not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed = now
+        os.makedirs(directory, exist_ok=True)
+        write_snapshot(
+            os.path.join(directory, self.snapshot_name()), self.snapshot()
+        )
+
+
+registry = MetricsRegistry()
+
+
+def snapshot_pid(path):
+    return int(os.path.basename(path).split('-')[1])
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, data):
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix='.tmp'
+    )
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def retire_dead_snapshots(directory):
+    """
+    Прибавляет снимки завершившихся процессов к metrics-retired.json
+    и удаляет их. Выполняется под блокировкой файла, иначе два
+    процесса прибавили бы один снимок дважды. Имена прибавленных
+    снимков хранятся в итоге до удаления файлов: сбой между записью
+    итога и удалением не приведёт к повторному сложению.
+    """
+    dead = [
+        path for path in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN))
+        if not is_alive(snapshot_pid(path))
+    ]
+    if not dead:
+        return
+    retired_path = os.path.join(directory, RETIRED_FILE)
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        retired = read_snapshot(retired_path) or {}
+        folded = {
+            name for name in retired.get('folded', ())
+            if os.path.exists(os.path.join(directory, name))
+        }
+        total = merge(empty_snapshot(), retired.get('data', empty_snapshot()))
+        for path in dead:
+            name = os.path.basename(path)
+            snapshot = read_snapshot(path)
+            if name in folded or snapshot is None:
+                continue
+            merge(total, snapshot)
+            folded.add(name)
+        write_snapshot(
+            retired_path, {'data': total, 'folded': sorted(folded)}
+        )
+        for path in dead:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def merge(total, snapshot):
+    for section in ('requests', 'queries', 'cache'):
+        for key, value in snapshot[section].items():
+            total[section][key] += value
+    for key, values in snapshot['latency'].items():
+        current = total['latency'].get(key)
+        total['latency'][key] = values if current is None else [
+            left + right for left, right in zip(current, values)
+        ]
+    return total
+
+
+def collect():
+    """Сумма счётчиков всех процессов, текущий берётся из памяти."""
+    total = merge(empty_snapshot(), registry.snapshot())
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return total
+    retire_dead_snapshots(directory)
+    retired = read_snapshot(os.path.join(directory, RETIRED_FILE))
+    if retired is not None:
+        merge(total, retired['data'])
+    own = registry.snapshot_name()
+    for path in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        if os.path.basename(path) == own:
+            continue
+        snapshot = read_snapshot(path)
+        if snapshot is not None:
+            merge(total, snapshot)
+    return total
+
+
+def response_cache_stats(resources):
+    """Попадания и промахи кэша ответов по ресурсам во всех процессах."""
+    cache = collect()['cache']
+    return {
+        resource: {
+            kind: cache.get(KEY_SEPARATOR.join((resource, result)), 0)
+            for kind, result in (('hits', 'hit'), ('misses', 'miss'))
+        }
+        for resource in resources
+    }
+
+
+def labels(**values):
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in values.items()
+    ) + '}'
+
+
+def render_latency(latency):
+    yield '# HELP yamdb_http_request_duration_seconds Время ответа.'
+    yield '# TYPE yamdb_http_request_duration_seconds histogram'
+    for key, values in sorted(latency.items()):
+        route, method = key.split(KEY_SEPARATOR)
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), values):
+            cumulative += count
+            yield 'yamdb_http_request_duration_seconds_bucket{} {}'.format(
+                labels(route=route, method=method, le=bound), cumulative
+            )
+        yield 'yamdb_http_request_duration_seconds_sum{} {:.6f}'.format(
+            labels(route=route, method=method), values[-2]
+        )
+        yield 'yamdb_http_request_duration_seconds_count{} {}'.format(
+            labels(route=route, method=method), values[-1]
+        )
+
+
+def render_prometheus(data):
+    lines = [
+        '# HELP yamdb_http_requests_total Число запросов.',
+        '# TYPE yamdb_http_requests_total counter',
+    ]
+    for key, value in sorted(data['requests'].items()):
+        route, method, status = key.split(KEY_SEPARATOR)
+        lines.append('yamdb_http_requests_total{} {}'.format(
+            labels(route=route, method=method, status=status), value
+        ))
+    lines.extend(render_latency(data['latency']))
+    lines.append('# HELP yamdb_db_queries_total Число SQL запросов.')
+    lines.append('# TYPE yamdb_db_queries_total counter')
+    for key, value in sorted(data['queries'].items()):
+        route, method = key.split(KEY_SEPARATOR)
+        lines.append('yamdb_db_queries_total{} {}'.format(
+            labels(route=route, method=method), value
+        ))
+    lines.append(
+        '# HELP yamdb_response_cache_requests_total Обращения к кэшу ответов.'
+    )
+    lines.append('# TYPE yamdb_response_cache_requests_total counter')
+    for key, value in sorted(data['cache'].items()):
+        resource, result = key.split(KEY_SEPARATOR)
+        lines.append('yamdb_response_cache_requests_total{} {}'.format(
+            labels(resource=resource, result=result), value
+        ))
+    return '\n'.join(lines) + '\n'
+
+
+def is_metrics_authorized(request):
+    """
+    С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>,
+    иначе адрес клиента из METRICS_ALLOWED_IPS. За обратным прокси на
+    том же хосте REMOTE_ADDR всегда 127.0.0.1, поэтому там нужен токен.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, value = header.partition(' ')
+    return scheme == 'Bearer' and hmac.compare_digest(
+        value.encode(), token.encode()
+    )
+
+
+def metrics_view(request):
+    """Метрики для Prometheus, доступ проверяет is_metrics_authorized."""
+    if not is_metrics_authorized(request):
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(collect()), content_type=CONTENT_TYPE
+    )
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Записывает метрики каждого запроса в реестр процесса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with execute_wrapper_all(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        route = match.url_name if match and match.url_name else (
+            UNMATCHED_ROUTE
+        )
+        if route != METRICS_ROUTE:
+            registry.observe_request(
+                route, request.method, response.status_code, duration,
+                counter.count,
+            )
+            registry.flush()
+        return response
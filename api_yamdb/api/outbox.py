@@ -0,0 +1,153 @@
+"""
+Очередь исходящих писем.
+
+Запрос не ждёт SMTP сервер: enqueue_mail() сохраняет письмо в таблицу
+email_outbox, а команда send_outbox забирает готовые к отправке письма
+пачками по EMAIL_OUTBOX_BATCH_SIZE и отправляет их через одно открытое
+соединение почтового бэкенда. Неудачная отправка повторяется с
+экспоненциальной задержкой, после EMAIL_OUTBOX_MAX_ATTEMPTS попыток
+письмо помечается как неотправленное.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import (OUTBOX_STATUS_FAILED, OUTBOX_STATUS_PENDING,
+                            OUTBOX_STATUS_SENT, OutboxMessage)
+from reviews.sqlite import lock_for_write
+
+
+def enqueue_mail(subject, body, recipient, from_email=None):
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        recipient=recipient,
+    )
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: удваивается с каждой неудачей."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def due_messages(now, batch_size):
+    """Готовые к отправке письма, ещё не заблокированные другими."""
+    return list(
+        OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+            status=OUTBOX_STATUS_PENDING, next_attempt_at__lte=now
+        )[:batch_size]
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Забирает готовые к отправке письма и откладывает их следующую
+    попытку на EMAIL_OUTBOX_LEASE: если обработчик упадёт, письма
+    вернутся в очередь, а второй обработчик не отправит их повторно.
+
+    Транзакция сразу берёт блокировку записи (lock_for_write), а UPDATE
+    повторяет условие готовности: письмо, которое успел забрать другой
+    обработчик, не продлевается и не возвращается. Возвращаются только
+    письма, получившие срок аренды этого вызова.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+    with transaction.atomic():
+        lock_for_write(OutboxMessage)
+        messages = due_messages(now, batch_size)
+        pks = [message.pk for message in messages]
+        ready = OutboxMessage.objects.filter(
+            pk__in=pks, status=OUTBOX_STATUS_PENDING, next_attempt_at__lte=now
+        )
+        if ready.update(next_attempt_at=lease) != len(messages):
+            claimed = set(OutboxMessage.objects.filter(
+                pk__in=pks, next_attempt_at=lease
+            ).values_list('pk', flat=True))
+            messages = [
+                message for message in messages if message.pk in claimed
+            ]
+    return messages
+
+
+def mark_failed(message, error):
+    message.attempts += 1
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        message.status = OUTBOX_STATUS_FAILED
+    else:
+        message.next_attempt_at = (
+            timezone.now() + retry_delay(message.attempts)
+        )
+    message.save(
+        update_fields=('attempts', 'last_error', 'status', 'next_attempt_at')
+    )
+
+
+class OutboxSender:
+    """
+    Отправляет письма из очереди через одно соединение бэкенда.
+    Соединение открывается при первой отправке и переживает пачки,
+    пока его не закроют close() или ошибка отправки.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.connection = get_connection(fail_silently=False)
+        self.opened = False
+        self.sent = 0
+        self.failed = 0
+
+    def open(self):
+        if not self.opened:
+            self.connection.open()
+            self.opened = True
+
+    def close(self):
+        if self.opened:
+            self.connection.close()
+            self.opened = False
+
+    def send_batch(self):
+        """Отправляет одну пачку, возвращает число обработанных писем."""
+        messages = claim_batch(self.batch_size)
+        if not messages:
+            return 0
+        sent = []
+        for message in messages:
+            try:
+                self.open()
+                EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=message.from_email,
+                    to=(message.recipient,),
+                    connection=self.connection,
+                ).send()
+            except Exception as error:
+                # Соединение после ошибки может быть разорвано:
+                # следующее письмо откроет новое.
+                self.close()
+                mark_failed(message, error)
+                self.failed += 1
+            else:
+                sent.append(message.pk)
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OUTBOX_STATUS_SENT, sent_at=timezone.now()
+        )
+        self.sent += len(sent)
+        return len(messages)
+
+    def send_pending(self):
+        """Отправляет все готовые письма, возвращает их число."""
+        total = 0
+        while True:
+            count = self.send_batch()
+            total += count
+            if count < self.batch_size:
+                return total
@@ -1,7 +1,192 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (CursorPagination, PageNumberPagination,
+                                       _reverse_ordering)
 
 
 class CategoryPagination(PageNumberPagination):
     """Кастомный пагинатор для Category."""
 
     page_size = 10
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорный пагинатор по составному ключу сортировки.
+    Позиция курсора хранит значения всех полей сортировки, поэтому
+    страница выбирается условием по ключу без OFFSET и COUNT(*),
+    и её стоимость не зависит от глубины.
+    Последним полем сортировки должен быть уникальный ключ.
+    """
+
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, current_position) = (False, None)
+        else:
+            (_, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(queryset, current_position, reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        if reverse:
+            self.page = list(reversed(self.page))
+        self.set_page_positions(reverse, current_position, following_position)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def set_page_positions(self, reverse, current_position,
+                           following_position):
+        """Определяет наличие и позиции соседних страниц."""
+        before, after = current_position, following_position
+        if reverse:
+            before, after = after, before
+        self.has_previous = before is not None
+        self.has_next = after is not None
+        if self.has_previous:
+            self.previous_position = before
+        if self.has_next:
+            self.next_position = after
+
+    def get_keyset_filter(self, queryset, position, reverse):
+        """
+        Условие «строго после позиции» для составного ключа:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        attnames = [self._get_attname(queryset.model, order)
+                    for order in self.ordering]
+        keyset_filter = Q()
+        for index, order in enumerate(self.ordering):
+            descending = order.startswith('-') != reverse
+            lookup = '__lt' if descending else '__gt'
+            condition = Q(**{attnames[index] + lookup: values[index]})
+            for attname, value in zip(attnames[:index], values[:index]):
+                condition &= Q(**{attname: value})
+            keyset_filter |= condition
+        return keyset_filter
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(
+                    instance, self._get_attname(type(instance), order)
+                )
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values, ensure_ascii=False)
+
+    @staticmethod
+    def _get_attname(model, order):
+        field_name = order.lstrip('-')
+        if field_name == 'pk':
+            return field_name
+        return model._meta.get_field(field_name).attname
+
+
+class TitleCursorPagination(KeysetCursorPagination):
+    """Курсорный пагинатор для Title."""
+
+    ordering = ('name', 'year', 'pk')
+
+
+class PublicationCursorPagination(KeysetCursorPagination):
+    """Курсорный пагинатор для Review и Comment."""
+
+    ordering = ('-pub_date', 'author', '-pk')
+
+
+class SwitchablePagination(PageNumberPagination):
+    """
+    Постраничный пагинатор с переключением на курсорный режим.
+    По умолчанию работает как PageNumberPagination, параметр
+    `?pagination=cursor` (или наличие `cursor`) включает курсорный режим.
+    """
+
+    cursor_pagination_class = None
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        if self.cursor_pagination_class is None:
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        page = self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+        self.display_page_controls = getattr(
+            self.cursor_paginator, 'display_page_controls', False
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+
+class TitlePagination(SwitchablePagination):
+    """Пагинатор для Title с курсорным режимом по (name, year)."""
+
+    cursor_pagination_class = TitleCursorPagination
+
+
+class PublicationPagination(SwitchablePagination):
+    """Пагинатор для Review и Comment с курсорным режимом по дате."""
+
+    cursor_pagination_class = PublicationCursorPagination
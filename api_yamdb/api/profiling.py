@@ -0,0 +1,172 @@
+"""
+Разбивка времени запроса по фазам для заголовка Server-Timing
+и профилирование отдельных запросов через cProfile.
+
+Фазы считаются без пересечений: пока идёт вложенная фаза (например,
+SQL запрос при аутентификации), время внешней фазы не растёт.
+  db        — выполнение SQL запросов;
+  auth      — аутентификация (JWT) без её запросов к БД;
+  throttle  — проверка ограничений частоты запросов;
+  view      — остальной код представления;
+  serialize — сериализация объектов или строк values() в данные
+              ответа без её запросов к БД;
+  render    — рендеринг ответа (JSON).
+"""
+import cProfile
+import hmac
+import os
+import re
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .sql import execute_wrapper_all, skip_in_call_sites
+
+PHASES = ('db', 'auth', 'throttle', 'view', 'serialize', 'render')
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+skip_in_call_sites(__file__)
+
+
+class RequestTimings:
+    """Накопитель времени фаз одного запроса со стеком вложенных фаз."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self.stack = []
+
+    def start(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            parent, since = self.stack[-1]
+            self.durations[parent] += now - since
+        self.stack.append((phase, now))
+
+    def stop(self):
+        now = time.perf_counter()
+        phase, since = self.stack.pop()
+        self.durations[phase] += now - since
+        if self.stack:
+            self.stack[-1] = (self.stack[-1][0], now)
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        self.queries += 1
+        with self.phase('db'):
+            return execute(sql, params, many, context)
+
+    def header(self):
+        total = time.perf_counter() - self.started
+        metrics = []
+        for phase in PHASES:
+            metric = f'{phase};dur={self.durations[phase] * 1000:.2f}'
+            if phase == 'db':
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def request_phase(request, name):
+    """Фаза запроса; без ServerTimingMiddleware ничего не замеряет."""
+    timings = getattr(request, 'server_timing', None)
+    if timings is None:
+        yield
+        return
+    with timings.phase(name):
+        yield
+
+
+class ServerTimingMixin:
+    """
+    Выделяет аутентификацию, троттлинг и сериализацию ответа
+    представлений DRF в фазы.
+    """
+
+    def perform_authentication(self, request):
+        with request_phase(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        with request_phase(request, 'throttle'):
+            super().check_throttles(request)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        to_representation = serializer.to_representation
+
+        def timed_representation(instance):
+            with request_phase(self.request, 'serialize'):
+                return to_representation(instance)
+        # serializer.data вызывает to_representation() один раз на ответ.
+        serializer.to_representation = timed_representation
+        return serializer
+
+
+def profile_filename(request):
+    path = re.sub(r'[^\w]+', '-', request.path).strip('-') or 'root'
+    return '{}-{}-{}-{}.prof'.format(
+        time.strftime('%Y%m%d-%H%M%S'), uuid.uuid4().hex[:8],
+        request.method.lower(), path,
+    )
+
+
+def is_profiling_authorized(request):
+    token = settings.PROFILING_TOKEN
+    header = request.META.get(PROFILE_HEADER)
+    return bool(token and header) and hmac.compare_digest(
+        header.encode(), token.encode()
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет заголовок Server-Timing к каждому ответу. Запросы
+    с заголовком X-Profile, равным PROFILING_TOKEN, дополнительно
+    профилируются cProfile; дамп пишется в PROFILING_DIR, его имя
+    возвращается в заголовке X-Profile-File.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_profiling_authorized(request):
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.timed_response, request)
+            filename = profile_filename(request)
+            os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(settings.PROFILING_DIR, filename))
+            response['X-Profile-File'] = filename
+            return response
+        return self.timed_response(request)
+
+    def timed_response(self, request):
+        if not settings.SERVER_TIMING_ENABLED:
+            return self.get_response(request)
+        timings = request.server_timing = RequestTimings()
+        with execute_wrapper_all(timings.execute_wrapper):
+            with timings.phase('view'):
+                response = self.get_response(request)
+        response['Server-Timing'] = timings.header()
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'server_timing', None)
+        if timings is not None:
+            timings.start('render')
+            response.add_post_render_callback(lambda _: timings.stop())
+        return response
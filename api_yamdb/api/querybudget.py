@@ -0,0 +1,175 @@
+"""
+Счётчик SQL запросов с бюджетами на представления.
+
+Вьюсет объявляет бюджет по действиям:
+
+    class TitleViewSet(viewsets.ModelViewSet):
+        query_budgets = {'list': 4, 'retrieve': 3}
+
+QueryBudgetMiddleware считает запросы каждого (или каждого
+QUERY_BUDGET_SAMPLE_RATE-го) запроса к API, группирует их по отпечаткам
+и сообщает о превышении бюджета и о повторах одного запроса с разными
+параметрами (N+1). При QUERY_BUDGET_RAISE нарушение бюджета приводит
+к исключению, иначе пишется в лог вместе с местом вызова.
+"""
+import logging
+import random
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .sql import (call_site, execute_wrapper_all, fingerprint,
+                  skip_in_call_sites)
+
+logger = logging.getLogger(__name__)
+skip_in_call_sites(__file__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryStats:
+    """Запросы одного отпечатка: число, разные параметры, место вызова."""
+
+    def __init__(self, sql, site):
+        self.sql = sql
+        self.site = site
+        self.count = 0
+        self.params = set()
+
+
+class QueryRecorder:
+    """
+    Обёртка выполнения запросов (connection.execute_wrapper),
+    собирающая статистику по отпечаткам SQL.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.statements = OrderedDict()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        key = fingerprint(sql)
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = QueryStats(sql, call_site())
+        stats.count += 1
+        stats.params.add(repr(params))
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold=None):
+        """Отпечатки, выполненные с threshold и более наборами параметров."""
+        if threshold is None:
+            threshold = settings.QUERY_REPEAT_THRESHOLD
+        return OrderedDict(
+            (key, stats) for key, stats in self.statements.items()
+            if len(stats.params) >= threshold
+        )
+
+    def violations(self, budget):
+        """Описания нарушений: превышение бюджета и повторы (N+1)."""
+        problems = []
+        if budget is not None and self.total > budget:
+            problems.append(
+                f'выполнено {self.total} запросов при бюджете {budget}'
+            )
+        for key, stats in self.repeated().items():
+            problems.append(
+                f'N+1: {stats.count} раз «{key}» из {stats.site}'
+            )
+        return problems
+
+    def report(self):
+        return '\n'.join(
+            f'{stats.count:>4} x {key} ({stats.site})'
+            for key, stats in self.statements.items()
+        )
+
+
+@contextmanager
+def query_budget(budget, using='default'):
+    """
+    Проверка бюджета в тестах:
+
+        with query_budget(3):
+            client.get('/api/v1/titles/')
+    """
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+    problems = recorder.violations(budget)
+    if problems:
+        raise QueryBudgetExceeded(
+            '; '.join(problems) + '\n' + recorder.report()
+        )
+
+
+def get_view_budget(view_func, method):
+    """
+    Бюджет действия вьюсета; view_func — функция из as_view(),
+    у вьюсетов DRF она хранит класс и соответствие метод -> действие.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    budgets = getattr(view_class, 'query_budgets', None)
+    if not budgets:
+        return None, None
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    name = f'{view_class.__name__}.{action}'
+    return name, budgets.get(action)
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к БД в выборке запросов к API и проверяет бюджеты
+    представлений. Повторы запроса (N+1) у представлений с бюджетом
+    считаются нарушением, у остальных только пишутся в лог.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_sampled():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with execute_wrapper_all(recorder):
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget_view = view_func
+
+    @staticmethod
+    def is_sampled():
+        if not settings.QUERY_BUDGET_ENABLED:
+            return False
+        rate = settings.QUERY_BUDGET_SAMPLE_RATE
+        return rate >= 1 or random.random() < rate
+
+    def check(self, request, recorder):
+        view_func = getattr(request, 'query_budget_view', None)
+        if view_func is None:
+            return
+        name, budget = get_view_budget(view_func, request.method)
+        if budget is None:
+            for key, stats in recorder.repeated().items():
+                logger.warning(
+                    'N+1 в %s %s: %s раз «%s» из %s', request.method,
+                    request.path, stats.count, key, stats.site,
+                )
+            return
+        problems = recorder.violations(budget)
+        if not problems:
+            return
+        message = '{} ({} {}): {}'.format(
+            name, request.method, request.path, '; '.join(problems)
+        )
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message + '\n' + recorder.report())
+        logger.warning('%s\n%s', message, recorder.report())
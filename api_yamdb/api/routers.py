@@ -0,0 +1,129 @@
+"""
+Маршрутизация запросов к БД между основной базой и репликами.
+
+Записи, миграции и любые чтения вне ReplicaReadMixin идут в default.
+Чтения в действиях replica_actions вьюсетов с ReplicaReadMixin
+распределяются по REPLICA_DATABASES, кроме:
+  - чтений внутри транзакции default;
+  - запросов пользователя, который сам писал в последние
+    REPLICA_STICKY_SECONDS секунд (read-your-writes): реплика может
+    ещё не содержать его изменений.
+Реплика выбирается одна на запрос, чтобы COUNT, страница и prefetch
+читали одну и ту же копию. Отметка записи хранится в общем кэше
+REPLICA_STICKY_CACHE_ALIAS и действует во всех воркерах.
+Реплики — копии основной базы, например файлы SQLite, которые команда
+sync_replicas заменяет целиком; соединение с заменённой репликой
+переоткрывается в начале следующего запроса.
+"""
+import os
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_KEY_PREFIX = 'replica-sticky'
+
+# Реплика текущего запроса или None, если чтения идут в default.
+request_replica = ContextVar('request_replica', default=None)
+
+
+def sticky_cache():
+    return caches[settings.REPLICA_STICKY_CACHE_ALIAS]
+
+
+def sticky_key(user):
+    return f'{STICKY_KEY_PREFIX}:{user.pk}'
+
+
+def mark_sticky(user):
+    """Направляет чтения пользователя в основную БД на время задержки."""
+    if replicas_enabled() and user.is_authenticated:
+        sticky_cache().set(
+            sticky_key(user), True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def is_sticky(user):
+    return user.is_authenticated and sticky_cache().get(
+        sticky_key(user), False
+    )
+
+
+def replicas_enabled():
+    return bool(settings.REPLICA_DATABASES)
+
+
+def choose_replica():
+    """
+    Реплика для запроса. Открытое соединение закрывается, если файл
+    реплики с тех пор заменён: иначе оно читало бы старую копию.
+    """
+    alias = random.choice(settings.REPLICA_DATABASES)
+    connection = connections[alias]
+    try:
+        inode = os.stat(connection.settings_dict['NAME']).st_ino
+    except OSError:
+        return alias
+    if (
+        connection.connection is not None
+        and getattr(connection, 'replica_inode', inode) != inode
+    ):
+        connection.close()
+    connection.replica_inode = inode
+    return alias
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = request_replica.get()
+        if alias is None or alias not in settings.REPLICA_DATABASES:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Разрешает чтение из реплик в безопасных запросах к действиям
+    replica_actions. Аутентификация выполняется до переключения,
+    поэтому пользователь читается из основной БД.
+    """
+
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        token = request_replica.set(None)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            request_replica.reset(token)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            mark_sticky(self.request.user)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replicas_enabled()
+            and request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_sticky(request.user)
+        ):
+            request_replica.set(choose_replica())
@@ -1,8 +1,12 @@
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework.validators import UniqueTogetherValidator
 
-from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.models import (Category, Comment, CustomUser, Genre, GenreTitle,
+                            Review, Title)
 
 from .utils import CurrentTitleDefault
 
@@ -79,15 +83,51 @@ class TitleReadSerializer(serializers.ModelSerializer):
                   'description', 'genre', 'category')
 
     def get_rating(self, obj):
-        """Метод для вычисления усреднённой оценки произведения."""
-        reviews = Review.objects.filter(title=obj.id)
-        total_scores = []
-        for review in reviews:
-            total_scores.append(review.score)
-        if not total_scores:
-            return None
-        rating = round(sum(total_scores) / len(total_scores))
-        return rating
+        """Усреднённая оценка из хранимых в произведении агрегатов."""
+        return obj.rating
+
+
+def resolve_slugs(field, slugs):
+    """
+    Объекты по слагам для поля SlugRelatedField: одним запросом или из
+    context['preloaded_slugs'][модель], который заполняет массовая
+    запись (api/bulk.py) один раз на пачку.
+    """
+    queryset = field.get_queryset()
+    preloaded = field.context.get('preloaded_slugs', {}).get(queryset.model)
+    if preloaded is not None:
+        return {slug: preloaded[slug] for slug in slugs if slug in preloaded}
+    return {
+        getattr(obj, field.slug_field): obj
+        for obj in queryset.filter(**{f'{field.slug_field}__in': slugs})
+    }
+
+
+class SlugListField(serializers.ManyRelatedField):
+    """
+    Список слагов: объекты читаются одним запросом, а не по запросу
+    на слаг, и все неизвестные слаги возвращаются одной ошибкой.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        if not all(isinstance(slug, str) for slug in data):
+            child.fail('invalid')
+        slugs = list(dict.fromkeys(data))
+        found = resolve_slugs(child, slugs)
+        missing = [slug for slug in slugs if slug not in found]
+        if missing:
+            raise ValidationError([
+                child.error_messages['does_not_exist'].format(
+                    slug_name=child.slug_field, value=smart_str(slug)
+                )
+                for slug in missing
+            ])
+        return [found[slug] for slug in slugs]
 
 
 class TitlesRepresentation(serializers.SlugRelatedField):
@@ -95,9 +135,31 @@ class TitlesRepresentation(serializers.SlugRelatedField):
     def to_representation(self, value):
         return {'name': value.name, 'slug': value.slug}
 
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        obj = resolve_slugs(self, [data]).get(data)
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        return obj
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugListField(**list_kwargs)
+
 
 class TitleWriteSerializer(serializers.ModelSerializer):
-    """Сериализатор для записи Произведений."""
+    """
+    Сериализатор для записи Произведений.
+    Жанры сохраняются одной синхронизацией связей GenreTitle.
+    """
 
     genre = TitlesRepresentation(
         slug_field='slug', queryset=Genre.objects.all(), many=True
@@ -110,6 +172,23 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        GenreTitle.objects.sync({title.pk: [genre.pk for genre in genres]})
+        return title
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            GenreTitle.objects.sync(
+                {title.pk: [genre.pk for genre in genres]}
+            )
+        return title
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Ревью."""
@@ -0,0 +1,112 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from reviews.models import (Category, Comment, CustomUser, Genre, GenreTitle,
+                            Review, Title)
+from reviews.signals import data_imported, genres_synced
+
+from .authentication import invalidate_user, revoke_tokens
+from .cache import invalidate_all, invalidate_on_commit
+
+# Поля пользователя, от которых зависят права в подписанном токене.
+ACCESS_FIELDS = ('role', 'is_active', 'is_superuser')
+
+
+def title_scopes(*title_ids):
+    """Области кэша списка произведений и карточек указанных произведений."""
+    return ('titles', *(f'title:{pk}' for pk in title_ids if pk))
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_on_commit(title_scopes(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=GenreTitle)
+def invalidate_genre_title(sender, instance, **kwargs):
+    invalidate_on_commit(title_scopes(instance.title_id))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        invalidate_on_commit(title_scopes(*(pk_set or ())))
+    else:
+        invalidate_on_commit(title_scopes(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    invalidate_on_commit((
+        f'reviews:{instance.title_id}', *title_scopes(instance.title_id)
+    ))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate_on_commit((f'comments:{instance.review_id}',))
+
+
+@receiver(genres_synced)
+def invalidate_synced_genres(sender, title_ids, **kwargs):
+    invalidate_on_commit(title_scopes(*title_ids))
+
+
+@receiver(pre_save, sender=CustomUser)
+def invalidate_username(sender, instance, **kwargs):
+    """
+    Имя автора выводится в отзывах и комментариях. Смена роли или
+    активности отзывает токены с прежней ролью.
+    """
+    if instance.pk is None:
+        return
+    fields = ('username', *ACCESS_FIELDS)
+    old = sender.objects.filter(pk=instance.pk).values_list(
+        *fields
+    ).first()
+    if old is None:
+        return
+    old = dict(zip(fields, old))
+    if old['username'] != instance.username:
+        invalidate_on_commit(('users',))
+    if any(old[name] != getattr(instance, name) for name in ACCESS_FIELDS):
+        # Сохранение объекта не должно вернуть прежнее время отзыва.
+        instance.tokens_revoked_at = revoke_tokens(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Роль и активность пользователя читаются из кэша аутентификации."""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    title_ids = GenreTitle.objects.filter(
+        genre=instance
+    ).values_list('title_id', flat=True)
+    invalidate_on_commit(('genres', *title_scopes(*title_ids)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    title_ids = Title.objects.filter(
+        category=instance
+    ).values_list('pk', flat=True)
+    invalidate_on_commit(('categories', *title_scopes(*title_ids)))
+
+
+@receiver(data_imported)
+def invalidate_imported(sender, **kwargs):
+    invalidate_all()
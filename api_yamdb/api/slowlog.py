@@ -0,0 +1,153 @@
+"""
+Журнал медленных SQL запросов.
+
+SlowQueryMiddleware подключает обёртку выполнения запросов ко всем
+соединениям с БД на время запроса (execute_wrapper_all). Запросы
+дольше SLOW_QUERY_THRESHOLD_MS дописываются строкой JSON
+в SLOW_QUERY_LOG вместе с отпечатком и местом вызова. Для SELECT,
+впервые попавшего в журнал или ставшего самым медленным в своём
+отпечатке, сохраняется план выполнения (EXPLAIN QUERY PLAN в SQLite).
+Отчёт строит команда slow_queries.
+
+Значения параметров (адреса почты, коды подтверждения, текст отзывов)
+не пишутся на диск: SQL Django содержит только заполнители %s, а сами
+параметры попадают в журнал лишь при SLOW_QUERY_LOG_PARAMS.
+"""
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .sql import (call_site, execute_wrapper_all, fingerprint,
+                  skip_in_call_sites)
+
+skip_in_call_sites(__file__)
+
+
+class SlowQueryLog:
+    """Обёртка выполнения запросов одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Отпечаток -> максимальное время, для которого снят план.
+        self.explained = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= threshold:
+                self.record(
+                    context['connection'], sql, params, many, duration
+                )
+
+    def record(self, connection, sql, params, many, duration):
+        key = fingerprint(sql)
+        logged_params = None
+        if settings.SLOW_QUERY_LOG_PARAMS and not many:
+            logged_params = [str(value) for value in params or ()]
+        entry = {
+            'time': time.time(),
+            'fingerprint': key,
+            'sql': sql,
+            'params': logged_params,
+            'duration_ms': round(duration, 3),
+            'call_site': call_site(),
+            'plan': None,
+        }
+        if not many and self.should_explain(key, duration, sql):
+            entry['plan'] = self.explain(connection, sql, params)
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        path = settings.SLOW_QUERY_LOG
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def should_explain(self, key, duration, sql):
+        if not settings.SLOW_QUERY_EXPLAIN:
+            return False
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return False
+        with self.lock:
+            if duration <= self.explained.get(key, -1):
+                return False
+            self.explained[key] = duration
+        return True
+
+    def explain(self, connection, sql, params):
+        prefix = (
+            'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite'
+            else 'EXPLAIN'
+        )
+        # Курсор драйвера в обход обёрток: план не попадает ни в журнал,
+        # ни в счётчики запросов текущего HTTP запроса.
+        try:
+            with connection.cursor() as cursor:
+                cursor.cursor.execute(f'{prefix} {sql}', params)
+                return [
+                    ' '.join(str(column) for column in row)
+                    for row in cursor.cursor.fetchall()
+                ]
+        except Exception as error:
+            return [f'EXPLAIN не выполнен: {error}']
+
+
+slow_query_log = SlowQueryLog()
+
+
+class SlowQueryMiddleware:
+    """
+    Подключает журнал к соединениям на время запроса. Обёртка ставится
+    и снимается в том же порядке, что и обёртки остальных middleware:
+    добавленная при открытии соединения обёртка снималась бы вместо
+    чужой (execute_wrapper удаляет последний элемент списка).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            return self.get_response(request)
+        with execute_wrapper_all(slow_query_log):
+            return self.get_response(request)
+
+
+def read_entries(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам: число, суммарное и максимальное время, план."""
+    report = {}
+    for entry in entries:
+        stats = report.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'worst': None,
+            'plan': None,
+        })
+        stats['count'] += 1
+        stats['total_ms'] += entry['duration_ms']
+        if entry['duration_ms'] >= stats['max_ms']:
+            stats['max_ms'] = entry['duration_ms']
+            stats['worst'] = entry
+        if entry.get('plan') and (
+            stats['plan'] is None or entry is stats['worst']
+        ):
+            stats['plan'] = entry['plan']
+    return list(report.values())
@@ -0,0 +1,131 @@
+import inspect
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+
+import django
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import Serializer
+
+# Порядок важен: сначала строки, затем числа, затем списки IN.
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+# Каталог установленных пакетов: виртуальное окружение может лежать
+# внутри проекта, его кадры не считаются кодом проекта.
+SITE_PACKAGES = os.path.dirname(os.path.dirname(django.__file__))
+
+
+def fingerprint(sql):
+    """
+    Нормализует SQL: литералы и параметры заменяются на ?, списки IN
+    сворачиваются, поэтому запросы, отличающиеся только значениями,
+    получают одинаковый отпечаток.
+    """
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+DJANGO_DB_DIR = os.path.join(os.path.dirname(django.__file__), 'db')
+PROJECT, LIBRARY, DJANGO_DB = 'project', 'library', 'django.db'
+# Модули с обёртками выполнения запросов и обработчиков представлений
+# (кэш ответов): их кадры не бывают местом вызова.
+INSTRUMENTATION_FILES = set()
+
+
+def skip_in_call_sites(filename):
+    INSTRUMENTATION_FILES.add(filename)
+
+
+@lru_cache(maxsize=None)
+def describe_file(filename):
+    """Короткий путь файла и его вид: код проекта, django.db или библиотека."""
+    filename = os.path.abspath(filename)
+    if filename.startswith(DJANGO_DB_DIR):
+        return os.path.relpath(filename, SITE_PACKAGES), DJANGO_DB
+    if filename.startswith(SITE_PACKAGES):
+        return os.path.relpath(filename, SITE_PACKAGES), LIBRARY
+    if filename.startswith(settings.BASE_DIR):
+        return os.path.relpath(filename, settings.BASE_DIR), PROJECT
+    return filename, LIBRARY
+
+
+@lru_cache(maxsize=None)
+def describe_class(cls):
+    """«путь:строка» объявления класса."""
+    try:
+        filename = inspect.getsourcefile(cls)
+        line = inspect.getsourcelines(cls)[1]
+    except (OSError, TypeError):
+        return cls.__module__
+    return f'{describe_file(filename)[0]}:{line}'
+
+
+def serializer_field(frame):
+    """
+    Поле, которое выводит сериализатор DRF в кадре его
+    to_representation(), или None для других кадров.
+    """
+    if frame.f_code.co_name != 'to_representation':
+        return None
+    local_vars = frame.f_locals
+    serializer = local_vars.get('self')
+    field = local_vars.get('field')
+    if not isinstance(serializer, Serializer) or field is None:
+        return None
+    cls = type(serializer)
+    return f'{describe_class(cls)} in {cls.__name__}.{field.field_name}'
+
+
+def call_site():
+    """
+    Место вызова запроса «путь:строка в функции».
+
+    Если запрос выполнен при выводе поля сериализатора DRF (N+1 по
+    связи без select_related/prefetch_related), местом вызова считается
+    это поле: «путь:строка в Сериализатор.поле». Иначе — первый кадр
+    стека из кода проекта, пропуская кадры, которые лишь передают вызов
+    методу с тем же именем того же объекта (super().list() в миксинах
+    представлений), а если такого нет — первый кадр вне django.db.
+    Кадры обходятся напрямую, без форматирования всего стека.
+    """
+    fallback = None
+    delegated = set()
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        field_site = serializer_field(frame)
+        if field_site is not None:
+            return field_site
+        owner = frame.f_locals.get('self')
+        method = None if owner is None else (id(owner), code.co_name)
+        path, kind = describe_file(code.co_filename)
+        if (kind != DJANGO_DB and code.co_filename not in INSTRUMENTATION_FILES
+                and method not in delegated):
+            site = f'{path}:{frame.f_lineno} in {code.co_name}'
+            if kind == PROJECT:
+                return site
+            if fallback is None:
+                fallback = site
+        if method is not None:
+            delegated.add(method)
+        frame = frame.f_back
+    return fallback
+
+
+@contextmanager
+def execute_wrapper_all(wrapper):
+    """Обёртка выполнения запросов на всех БД, включая реплики."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
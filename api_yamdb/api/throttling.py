@@ -0,0 +1,276 @@
+"""
+Троттлинг с постоянным объёмом состояния на клиента.
+
+AnonRateThrottle и UserRateThrottle из DRF хранят в кэше список меток
+времени всех запросов клиента за период: проверка стоит O(запросов),
+а список сериализуется в кэш при каждом запросе. Здесь состояние клиента
+— три числа, которые обновляет алгоритм:
+
+* sliding_window — счётчики текущего и предыдущего окна, оценка числа
+  запросов за последние duration секунд взвешивает предыдущее окно;
+* token_bucket — корзина на num_requests токенов, пополняется
+  равномерно; допускает всплеск до размера корзины.
+
+Состояние хранится в THROTTLE_STORE. SQLiteThrottleStore держит его в
+файле THROTTLE_DB, общем для всех процессов на хосте; CacheThrottleStore
+использует кэш Django THROTTLE_CACHE_ALIAS. Если хранилище недоступно
+(THROTTLE_DB заблокирован дольше THROTTLE_DB_TIMEOUT), запрос
+пропускается без ограничения, а сбой пишется в лог: троттлинг не должен
+превращать занятую базу троттлинга в ответы 500.
+
+Область (scope) троттлинга задаётся классом (anon, user), а вью может
+уточнить её атрибутом throttle_scope: тогда лимит берётся из
+DEFAULT_THROTTLE_RATES['<scope>:<throttle_scope>'], если он задан,
+и считается отдельно от остальных эндпоинтов.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'throttle'
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(rate):
+    """'100/day' -> (100, 86400), как SimpleRateThrottle.parse_rate."""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def sliding_window(state, now, num_requests, duration):
+    """
+    Скользящее окно по двум счётчикам фиксированных окон.
+    Состояние: (начало текущего окна, запросов в нём, в предыдущем).
+    Возвращает (разрешён ли запрос, новое состояние, ожидание в секундах).
+    """
+    window = now - now % duration
+    start, current, previous = state or (window, 0, 0)
+    if window != start:
+        previous = current if window - start == duration else 0
+        start, current = window, 0
+    elapsed = now - start
+    if previous * (1 - elapsed / duration) + current + 1 <= num_requests:
+        return True, (start, current + 1, previous), None
+    if current + 1 > num_requests or not previous:
+        wait = duration - elapsed
+    else:
+        # Вес предыдущего окна должен упасть настолько,
+        # чтобы оценка с новым запросом уложилась в лимит.
+        free = (num_requests - 1 - current) / previous
+        wait = duration * (1 - free) - elapsed
+    return False, (start, current, previous), max(wait, 0)
+
+
+def token_bucket(state, now, num_requests, duration):
+    """
+    Корзина токенов ёмкостью num_requests, пополняется со скоростью
+    num_requests / duration. Состояние: (токенов, время обновления, 0).
+    """
+    rate = num_requests / duration
+    tokens, updated, _ = state or (num_requests, now, 0)
+    tokens = min(num_requests, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, (tokens - 1, now, 0), None
+    return False, (tokens, now, 0), (1 - tokens) / rate
+
+
+class SQLiteThrottleStore:
+    """
+    Состояние троттлинга в отдельном файле SQLite: общий для процессов
+    хоста, обновление выполняется в транзакции BEGIN IMMEDIATE.
+    """
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, '
+        'a REAL, b REAL, c REAL, expires REAL) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS throttle_expires ON throttle (expires)',
+    )
+    UPSERT_SQL = (
+        'INSERT INTO throttle (key, a, b, c, expires) '
+        'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+        'a = excluded.a, b = excluded.b, c = excluded.c, '
+        'expires = excluded.expires'
+    )
+
+    def __init__(self, path=None):
+        self.path = path
+        self.local = threading.local()
+
+    def connect(self):
+        path = self.path or settings.THROTTLE_DB
+        connections = getattr(self.local, 'connections', None)
+        if connections is None or self.local.pid != os.getpid():
+            # Соединения SQLite нельзя использовать после fork.
+            connections = self.local.connections = {}
+            self.local.pid = os.getpid()
+        if path not in connections:
+            connection = sqlite3.connect(
+                path, timeout=settings.THROTTLE_DB_TIMEOUT,
+                isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            connections[path] = connection
+        return connections[path]
+
+    def update(self, key, algorithm, now, ttl):
+        try:
+            return self.update_locked(key, algorithm, now, ttl)
+        except sqlite3.OperationalError as error:
+            logger.warning(
+                'Троттлинг пропущен, THROTTLE_DB недоступна: %s', error
+            )
+            return True, None
+
+    def update_locked(self, key, algorithm, now, ttl):
+        connection = self.connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            state = connection.execute(
+                'SELECT a, b, c FROM throttle WHERE key = ? AND expires > ?',
+                (key, now),
+            ).fetchone()
+            allowed, state, wait = algorithm(state, now)
+            connection.execute(self.UPSERT_SQL, (key, *state, now + ttl))
+            if random.random() < settings.THROTTLE_PRUNE_PROBABILITY:
+                connection.execute(
+                    'DELETE FROM throttle WHERE expires <= ?', (now,)
+                )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, wait
+
+    def clear(self):
+        self.connect().execute('DELETE FROM throttle')
+
+
+class CacheThrottleStore:
+    """
+    Состояние троттлинга в кэше Django. Чтение и запись не атомарны:
+    при гонке запрос может пройти сверх лимита, как и в DRF.
+    Кэш обычно общий с другими данными, поэтому clear() ничего не
+    удаляет: он сдвигает поколение состояний (ключ GENERATION_KEY),
+    состояния прежнего поколения не учитываются и истекают сами.
+    """
+    GENERATION_KEY = f'{KEY_PREFIX}:generation'
+
+    def update(self, key, algorithm, now, ttl):
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        stored = cache.get_many((self.GENERATION_KEY, key))
+        generation = stored.get(self.GENERATION_KEY, 0)
+        state = None
+        if key in stored and stored[key][0] == generation:
+            state = stored[key][1:]
+        allowed, state, wait = algorithm(state, now)
+        cache.set(key, (generation, *state), ttl)
+        return allowed, wait
+
+    def clear(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].set(
+            self.GENERATION_KEY, time.time_ns(), timeout=None
+        )
+
+
+_stores = {}
+
+
+def throttle_store():
+    path = settings.THROTTLE_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+class ConstantMemoryThrottle(BaseThrottle):
+    """
+    Базовый класс: наследник задаёт algorithm, а примесь — scope
+    и идентификатор клиента get_ident().
+    Лимиты читаются из настроек при каждом запросе, поэтому их можно
+    менять через override_settings.
+    """
+    scope = None
+    algorithm = None
+    timer = time.time
+    # Сколько периодов хранить состояние после последнего запроса.
+    ttl_periods = 2
+
+    def get_scope(self, view):
+        view_scope = getattr(view, 'throttle_scope', None)
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if view_scope and f'{self.scope}:{view_scope}' in rates:
+            return f'{self.scope}:{view_scope}'
+        return self.scope
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        ident = self.get_ident(request)
+        if ident is None:
+            return True
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        num_requests, duration = parse_rate(rate)
+
+        def algorithm(state, now):
+            return type(self).algorithm(state, now, num_requests, duration)
+
+        allowed, self.wait_seconds = throttle_store().update(
+            f'{KEY_PREFIX}:{scope}:{ident}',
+            algorithm,
+            self.timer(),
+            duration * self.ttl_periods,
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonThrottleMixin:
+    scope = 'anon'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+        return super().get_ident(request)
+
+
+class UserThrottleMixin:
+    scope = 'user'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return super().get_ident(request)
+
+
+class AnonSlidingWindowThrottle(AnonThrottleMixin, ConstantMemoryThrottle):
+    algorithm = sliding_window
+
+
+class UserSlidingWindowThrottle(UserThrottleMixin, ConstantMemoryThrottle):
+    algorithm = sliding_window
+
+
+class AnonTokenBucketThrottle(AnonThrottleMixin, ConstantMemoryThrottle):
+    algorithm = token_bucket
+    ttl_periods = 1
+
+
+class UserTokenBucketThrottle(UserThrottleMixin, ConstantMemoryThrottle):
+    algorithm = token_bucket
+    ttl_periods = 1
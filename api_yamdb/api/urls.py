@@ -22,6 +22,6 @@ router_v1.register(
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/auth/signup/', EmailRegistrationView.as_view()),
-    path('v1/auth/token/', AccessTokenView.as_view()),
+    path('v1/auth/signup/', EmailRegistrationView.as_view(), name='signup'),
+    path('v1/auth/token/', AccessTokenView.as_view(), name='token'),
 ]
@@ -1,32 +1,53 @@
-from django.core.mail import send_mail
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, views, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
+from rest_framework.parsers import JSONParser
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-
-from api_yamdb.settings import EMAIL_HOST_USER
-from reviews.models import Category, CustomUser, Genre, Title
 
-from .filters import TitleFilterBackend
-from .pagination import CategoryPagination
+from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.sqlite import lock_for_write
+
+from .authentication import current_user, token_for_user
+from .bulk import TitleBulkWriter
+from .cache import ConditionalGetMixin, ResponseCacheMixin
+from .fastread import (CategoryRowSerializer, CommentRowSerializer,
+                       FastListMixin, GenreRowSerializer,
+                       ReviewRowSerializer, TitleRowSerializer)
+from .fieldsets import SparseFieldsetMixin
+from .filters import FullTextSearchFilter, TitleFilterBackend
+from .outbox import enqueue_mail
+from .pagination import (CategoryPagination, PublicationPagination,
+                         TitlePagination)
+from .parsers import NDJSONParser
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsOwnerAdminModeratorOrReadOnly)
+from .profiling import ServerTimingMixin
+from .routers import ReplicaReadMixin
 from .serializers import (CategorySerializer, CommentSerializer,
                           ConfirmationCodeSerializer, EmailSerializer,
                           GenreSerializer, ReviewSerializer,
                           TitleReadSerializer, TitleWriteSerializer,
                           UserSerializer)
+from .throttling import AnonTokenBucketThrottle, UserSlidingWindowThrottle
+from .writer import run_write
 
 
 class ListCreateDestroyViewSet(
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
+    ServerTimingMixin,
+    SparseFieldsetMixin,
     viewsets.GenericViewSet
 ):
     """
@@ -36,7 +57,47 @@ class ListCreateDestroyViewSet(
     pass
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class MultiGetMixin:
+    """
+    Пакетное чтение в list: `?ids=1,2,3` возвращает объекты с этими id
+    в порядке запроса без пагинации и фильтров, отсутствующие id
+    перечисляются в `missing`. Число запросов не зависит от числа id:
+    один запрос объектов и запросы prefetch_related из get_queryset().
+    Используется вместе с SparseFieldsetMixin.
+    """
+    multi_get_param = 'ids'
+
+    def list(self, request, *args, **kwargs):
+        raw_ids = request.query_params.get(self.multi_get_param)
+        if raw_ids is None:
+            return super().list(request, *args, **kwargs)
+        ids = self.parse_ids(raw_ids)
+        objects = self.defer_unused_columns(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [objects[pk] for pk in ids if pk in objects], many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in objects],
+        })
+
+    def parse_ids(self, raw_ids):
+        try:
+            ids = [int(pk) for pk in raw_ids.split(',') if pk.strip()]
+        except ValueError:
+            raise ValidationError(
+                {self.multi_get_param: 'Ожидается список id через запятую.'}
+            )
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > settings.MULTI_GET_MAX_IDS:
+            raise ValidationError({self.multi_get_param: (
+                f'Не больше {settings.MULTI_GET_MAX_IDS} id за запрос.'
+            )})
+        return ids
+
+
+class UserViewSet(ServerTimingMixin, SparseFieldsetMixin,
+                  viewsets.ModelViewSet):
     """
     Вьюсет для кастомного юзера.
     Обрабатываемые запросы: GET, POST, PATCH, DELETE.
@@ -47,6 +108,9 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdmin,)
     search_fields = ('username',)
     lookup_field = 'username'
+    # Бюджеты запросов к БД (см. api/querybudget.py), включая
+    # запрос пользователя при JWT аутентификации без кэша.
+    query_budgets = {'list': 3, 'retrieve': 2}
 
     @action(
         detail=False,
@@ -54,40 +118,55 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def me(self, request):
+        user = current_user(request)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(data=serializer.data)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
-                request.user, data=request.data, partial=True
+                user, data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(data=serializer.data)
 
+    def perform_destroy(self, instance):
+        """
+        Удаляет пользователя вместе с его отзывами.
+        Рейтинг затронутых произведений пересчитывается.
+        """
+        with transaction.atomic():
+            titles = Title.objects.filter(
+                pk__in=list(instance.reviews.values_list('title', flat=True))
+            )
+            instance.delete()
+            titles.rebuild_ratings()
+
 
-class EmailRegistrationView(views.APIView):
+class EmailRegistrationView(ServerTimingMixin, views.APIView):
     """
     Вьюсет отправки регестрации юзера.
     Обрабатываемые запросы: POST.
     Эндпоинты: /auth/signup/
     """
     permission_classes = (AllowAny,)
+    # Корзина токенов: короткий всплеск допустим, поток регистраций — нет.
+    throttle_classes = (AnonTokenBucketThrottle, UserSlidingWindowThrottle)
+    throttle_scope = 'signup'
 
     @staticmethod
     def mail_send(email, user):
-        send_mail(
+        # Письмо отправит команда send_outbox, запрос SMTP не ждёт.
+        enqueue_mail(
             subject='YaMDB Confirmation Code',
-            message=(
+            body=(
                 f"""
                 Hello!
 
                 Your confirmation: {user.confirmation_code}
             """
             ),
-            from_email=EMAIL_HOST_USER,
-            recipient_list=(email,),
-            fail_silently=False,
+            recipient=email,
         )
 
     def post(self, request):
@@ -102,13 +181,15 @@ class EmailRegistrationView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AccessTokenView(views.APIView):
+class AccessTokenView(ServerTimingMixin, views.APIView):
     """
     Вьюсет для получения/обновления токена.
     Обрабатываемые запросы: POST.
     Эндпоинты: /auth/token/
     """
     permission_classes = (AllowAny,)
+    throttle_classes = (AnonTokenBucketThrottle, UserSlidingWindowThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = ConfirmationCodeSerializer(data=request.data)
@@ -135,10 +216,11 @@ class AccessTokenView(views.APIView):
 
     @staticmethod
     def get_token(user):
-        return {'token': str(AccessToken.for_user(user))}
+        return {'token': str(token_for_user(user))}
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                      ResponseCacheMixin, ListCreateDestroyViewSet):
     """
     Вьюсет для модели Category.
     Обрабатывает запросы: GET, POST, DELETE
@@ -146,14 +228,20 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    row_serializer_class = CategoryRowSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (SearchFilter,)
     search_fields = ('=name',)
     lookup_field = 'slug'
     pagination_class = CategoryPagination
+    query_budgets = {'list': 3}
+
+    def get_cache_scopes(self):
+        return ('categories',)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                   ResponseCacheMixin, ListCreateDestroyViewSet):
     """
     Вьюсет для модели Genre.
     Обрабатывает запросы: GET, POST, DELETE
@@ -161,35 +249,90 @@ class GenreViewSet(ListCreateDestroyViewSet):
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    row_serializer_class = GenreRowSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (SearchFilter,)
     search_fields = ('=name',)
     lookup_field = 'slug'
     pagination_class = PageNumberPagination
+    query_budgets = {'list': 3}
+
+    def get_cache_scopes(self):
+        return ('genres',)
 
     def retrieve(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, ConditionalGetMixin, ResponseCacheMixin,
+                   ServerTimingMixin, SparseFieldsetMixin, MultiGetMixin,
+                   FastListMixin, viewsets.ModelViewSet):
     """
     Вьюсет для модели Title.
     Обрабатывает запросы: GET, POST, PATCH, DELETE, GET 1 элемента.
-    Эндпоинты: /titles/, /titles/{titles_id}/
+    Эндпоинты: /titles/, /titles/{titles_id}/, /titles/?ids=1,2,3,
+    /titles/bulk/
     """
-    queryset = Title.objects.all()
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
     filterset_class = TitleFilterBackend
-    pagination_class = PageNumberPagination
+    pagination_class = TitlePagination
+    row_serializer_class = TitleRowSerializer
+    throttle_scope = 'titles'
+    query_budgets = {'list': 4, 'retrieve': 3}
+
+    sparse_field_columns = {'rating': ('score_sum', 'review_count')}
+
+    def get_queryset(self):
+        """
+        Категория присоединяется в том же запросе, жанры всей страницы
+        подгружаются одним запросом. Рейтинг хранится в самом произведении.
+        Связи, не запрошенные через `?fields=`, не читаются.
+        """
+        queryset = Title.objects.all()
+        if self.is_field_requested('category'):
+            queryset = queryset.select_related('category')
+        if self.is_field_requested('genre'):
+            queryset = queryset.prefetch_related('genre')
+        return queryset
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            pk = self.kwargs['pk']
+            return (f'title:{int(pk) if pk.isdigit() else pk}',)
+        return ('titles',)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            partial(self.cached_response, super().retrieve),
+            request, *args, **kwargs
+        )
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return TitleWriteSerializer
         return TitleReadSerializer
 
+    @action(
+        detail=False,
+        methods=('post',),
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk(self, request):
+        """
+        Создание и обновление пачки произведений одним запросом
+        (JSON массив или NDJSON), результат — по каждому элементу.
+        """
+        writer = TitleBulkWriter(request.data, self.get_serializer_context())
+        results = writer.save()
+        return Response(
+            {'results': results}, status=writer.response_status()
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin, ServerTimingMixin,
+                    SparseFieldsetMixin, FastListMixin,
+                    viewsets.ModelViewSet):
     """
     Вьюсет для модели Review.
     Обрабатывает запросы: GET, POST, PATCH, DELETE, GET 1 элемента.
@@ -197,22 +340,75 @@ class ReviewViewSet(viewsets.ModelViewSet):
     /titles/{title_id}/reviews/{review_id}
     """
     serializer_class = ReviewSerializer
+    row_serializer_class = ReviewRowSerializer
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
-    filter_backends = (SearchFilter,)
+    filter_backends = (SearchFilter, FullTextSearchFilter)
     search_fields = ('=author__username',)
+    pagination_class = PublicationPagination
+    query_budgets = {'list': 4, 'retrieve': 3, 'create': 7}
+
+    def get_title(self):
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all()
+        queryset = Review.objects.filter(title=self.get_title())
+        if self.is_field_requested('author'):
+            queryset = queryset.select_related('author')
+        return queryset
+
+    def get_cache_scopes(self):
+        return (f'reviews:{int(self.kwargs["title_id"])}', 'users')
+
+    def check_parent_exists(self):
+        self.get_title()
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+        run_write(self.create_review, serializer, self.get_title())
+
+    def perform_update(self, serializer):
+        run_write(self.update_review, serializer)
+
+    def perform_destroy(self, instance):
+        run_write(self.destroy_review, instance)
+
+    def create_review(self, serializer, title):
+        review = serializer.save(author=self.request.user, title=title)
+        Title.objects.filter(pk=title.pk).update_rating(review.score, 1)
+
+    @staticmethod
+    def update_review(serializer):
+        # Чтение старой оценки до записи начало бы транзакцию SQLite
+        # со снимка, и запись после чужого COMMIT упала бы без ожидания.
+        lock_for_write(Review)
+        old_score = Review.objects.select_for_update().values_list(
+            'score', flat=True
+        ).get(pk=serializer.instance.pk)
+        review = serializer.save()
+        Title.objects.filter(pk=review.title_id).update_rating(
+            review.score - old_score
+        )
+
+    @staticmethod
+    def destroy_review(instance):
+        Title.objects.filter(pk=instance.title_id).update_rating(
+            -instance.score, -1
+        )
+        instance.delete()
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                     ServerTimingMixin, SparseFieldsetMixin, FastListMixin,
+                     viewsets.ModelViewSet):
     """
     Вьюсет для модели Comment.
     Обрабатывает запросы: GET, POST, PATCH, DELETE, GET 1 элемента.
@@ -220,18 +416,42 @@ class CommentViewSet(viewsets.ModelViewSet):
     /titles/{title_id}/reviews/{review_id}
     """
     serializer_class = CommentSerializer
+    row_serializer_class = CommentRowSerializer
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
+    pagination_class = PublicationPagination
+    query_budgets = {'list': 4, 'retrieve': 3}
+
+    def get_review(self):
+        """
+        Отзыв из URL, проверка принадлежности произведению
+        выполняется тем же запросом.
+        """
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        review_id = self.kwargs.get('review_id')
-        review = title.reviews.get(pk=review_id)
-        return review.comments.all()
+        queryset = Comment.objects.filter(review=self.get_review())
+        if self.is_field_requested('author'):
+            queryset = queryset.select_related('author')
+        return queryset
+
+    def get_cache_scopes(self):
+        return (f'comments:{int(self.kwargs["review_id"])}', 'users')
+
+    def check_parent_exists(self):
+        self.get_review()
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        review_id = self.kwargs.get('review_id')
-        review = title.reviews.get(pk=review_id)
-        serializer.save(author=self.request.user, review=review)
+        run_write(
+            serializer.save, author=self.request.user, review=self.get_review()
+        )
@@ -0,0 +1,155 @@
+"""
+Очередь записи в БД с одним потоком-писателем.
+
+SQLite допускает одну пишущую транзакцию, и под многопоточным
+WSGI сервером параллельные записи ждут блокировку или падают
+с «database is locked». При WRITE_QUEUE_ENABLED функции записи
+передаются через run_write() одному потоку: он забирает из очереди
+до WRITE_QUEUE_BATCH_SIZE ожидающих задач и выполняет их в одной
+транзакции, каждую — в своей точке сохранения. Ошибка задачи
+откатывает только её точку сохранения и возвращается её вызывающему,
+остальные задачи пачки фиксируются одним COMMIT.
+
+Вызывающий, не дождавшийся результата за WRITE_QUEUE_TIMEOUT, отменяет
+задачу, и писатель её пропускает: иначе запись, о которой клиенту уже
+ответили ошибкой, выполнилась бы позже. Задачу, которую писатель уже
+начал, отменить нельзя — тогда вызывающий дожидается её результата.
+Отменённая задача завершает запрос ответом 503 с Retry-After.
+"""
+import math
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, close_old_connections, connections,
+                       transaction)
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class WriteQueueBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Запись временно недоступна, повторите запрос позже.'
+    default_code = 'write_queue_busy'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # exception_handler DRF выставляет по нему заголовок Retry-After.
+        self.wait = max(1, math.ceil(wait))
+
+
+class WriteJob:
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class WriteQueue:
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        self.batches = 0
+
+    def submit(self, func, *args, **kwargs):
+        job = WriteJob(func, args, kwargs)
+        self.ensure_thread()
+        self.jobs.put(job)
+        return job.future
+
+    def ensure_thread(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # После fork (gunicorn) поток и очередь родителя
+                # в дочернем процессе не используются.
+                self.jobs = queue.Queue()
+                self.thread = None
+                self.pid = os.getpid()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='db-writer', daemon=True
+                )
+                self.thread.start()
+
+    def next_batch(self):
+        batch = [self.jobs.get()]
+        wait = settings.WRITE_QUEUE_MAX_WAIT_MS / 1000
+        while len(batch) < settings.WRITE_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self.jobs.get(timeout=wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            close_old_connections()
+            self.execute(batch)
+            self.batches += 1
+
+    def execute(self, batch):
+        # Отменённые вызывающими задачи пропускаются, остальные
+        # становятся выполняемыми и больше не могут быть отменены.
+        batch = [
+            job for job in batch if job.future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        results = []
+        try:
+            with transaction.atomic():
+                for job in batch:
+                    results.append(self.execute_job(job))
+        except Exception as error:
+            # COMMIT не удался: ни одна задача пачки не записана.
+            for job in batch:
+                job.future.set_exception(error)
+            return
+        for job, (result, error) in zip(batch, results):
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    @staticmethod
+    def execute_job(job):
+        try:
+            with transaction.atomic():
+                return job.func(*job.args, **job.kwargs), None
+        except Exception as error:
+            return None, error
+
+
+write_queue = WriteQueue()
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Выполняет функцию записи в транзакции: в потоке-писателе, если
+    очередь включена, иначе на месте. Если вызывающий уже находится
+    в транзакции, писатель не увидит её данных, поэтому запись
+    выполняется на месте.
+    """
+    if (
+        not settings.WRITE_QUEUE_ENABLED
+        or connections[DEFAULT_DB_ALIAS].in_atomic_block
+    ):
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    future = write_queue.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise WriteQueueBusy(settings.WRITE_QUEUE_TIMEOUT) from None
+        # Писатель уже выполняет задачу, её запись может быть
+        # зафиксирована: ответ должен отражать её результат.
+        return future.result()
@@ -29,6 +29,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ServerTimingMiddleware',
+    'api.querybudget.QueryBudgetMiddleware',
+    'api.slowlog.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,9 +68,68 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Постоянные соединения: секунды жизни соединения, 0 — на запрос
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Реплики для чтения (api/routers.py): пути к копиям БД через запятую,
+# копии обновляет команда sync_replicas
+REPLICA_DATABASES = []
+for number, path in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Время (с), в течение которого пользователь после записи читает
+# из основной БД, пока реплики не догонят её
+REPLICA_STICKY_SECONDS = 10
+# Общий кэш отметок записи, чтобы read-your-writes действовало
+# во всех воркерах
+REPLICA_STICKY_CACHE_ALIAS = 'default'
+
+# Настройки каждого нового соединения SQLite (reviews/sqlite.py):
+# WAL не блокирует читателей во время записи, synchronous=NORMAL
+# безопасен в режиме WAL, busy_timeout — ожидание блокировки записи (мс),
+# cache_size < 0 — размер кэша страниц в КиБ
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Кэш общий для всех процессов сервера: версии областей данных и ответы
+# должны меняться сразу у всех воркеров. По умолчанию — файлы в
+# CACHE_LOCATION, CACHE_BACKEND позволяет подключить, например, Redis.
+# Процессно-локальный LocMemCache отклоняется проверкой api.E001.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Кэш ответов анонимным пользователям (api/cache.py)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': ('django.contrib.auth.password_validation.'
@@ -106,33 +169,123 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'api.throttling.AnonSlidingWindowThrottle',
+        'api.throttling.UserSlidingWindowThrottle',
     ],
-    'DEFAULT_THROTTLE_RATES': {'anon': '100/day', 'user': '1000/day'},
+    # '<scope>:<throttle_scope вью>' задаёт отдельный лимит эндпоинта
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '100/day',
+        'user': '1000/day',
+        'anon:signup': '10/hour',
+        'anon:token': '30/hour',
+        'anon:titles': '1000/day',
+        'user:titles': '10000/day',
+    },
 }
 
+# Хранилище состояния троттлинга (api/throttling.py)
+THROTTLE_STORE = 'api.throttling.SQLiteThrottleStore'
+THROTTLE_DB = os.getenv(
+    'THROTTLE_DB', os.path.join(BASE_DIR, 'throttle.sqlite3')
+)
+THROTTLE_DB_TIMEOUT = 5
+THROTTLE_PRUNE_PROBABILITY = 0.001
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Наибольшая пачка POST /api/v1/titles/bulk/ (api/bulk.py)
+TITLE_BULK_MAX_ITEMS = 1000
+# Наибольшее число id в GET /api/v1/titles/?ids=
+MULTI_GET_MAX_IDS = 200
+# Списки читаются строками values() без сериализаторов DRF
+# (api/fastread.py), 'false' возвращает обычные сериализаторы.
+FAST_READ_LISTS = os.getenv('FAST_READ_LISTS', 'true') == 'true'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(days=2),
     'JWT_ALLOW_REFRESH': True,
     'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=7),
 }
 
+# Кэш пользователей JWT аутентификации (api/authentication.py)
+JWT_USER_CACHE_ALIAS = 'default'
+JWT_USER_CACHE_TIMEOUT = 60 * 5
+# Брать роль из подписанного поля токена, не читая запись пользователя.
+# Активность и существование пользователя тогда не проверяются: смена
+# роли, деактивация и удаление отклоняют ранее выпущенные токены по
+# времени отзыва (CustomUser.tokens_revoked_at), которое читается через
+# кэш JWT_USER_CACHE_ALIAS раз в JWT_USER_CACHE_TIMEOUT.
+JWT_TRUST_ROLE_CLAIM = os.getenv('JWT_TRUST_ROLE_CLAIM', '') == 'true'
+
 EMPTY_VALUE_ADMIN_PANEL = '-empty-'
 
 AUTH_USER_MODEL = 'reviews.CustomUser'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Для локальной работы: django.core.mail.backends.filebased.EmailBackend
+# или django.core.mail.backends.console.EmailBackend.
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_USE_TLS = True
 
 EMAIL_HOST_USER = 'host@admin.com'
 
+# Очередь писем (api/outbox.py), отправляет команда send_outbox
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Задержка перед первым повтором, с; далее удваивается
+EMAIL_OUTBOX_RETRY_DELAY = 30
+# На сколько секунд забранное письмо скрыто от других обработчиков
+EMAIL_OUTBOX_LEASE = 300
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+
 MIN_STR = 30
 
 # Стартовая точка для проверки года произведения
 # 1895 - дата создания кинематографа
 CINEMATOGRAPHY_CREATION_YEAR = 1895
+
+# Бюджеты запросов к БД (api/querybudget.py): доля проверяемых запросов,
+# исключение вместо записи в лог и порог повторов для N+1
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_SAMPLE_RATE = 1 if DEBUG else 0.05
+QUERY_BUDGET_RAISE = DEBUG
+QUERY_REPEAT_THRESHOLD = 3
+
+# Заголовок Server-Timing и профилирование запросов (api/profiling.py):
+# запрос с заголовком X-Profile: <PROFILING_TOKEN> сохраняет дамп cProfile
+SERVER_TIMING_ENABLED = True
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Метрики Prometheus (api/metrics.py). При нескольких процессах
+# METRICS_DIR — общий каталог снимков счётчиков процессов.
+# METRICS_ALLOWED_IPS сверяется с REMOTE_ADDR: за обратным прокси на том
+# же хосте это адрес прокси, и список пропускает всех. Там нужен
+# METRICS_TOKEN (заголовок Authorization: Bearer <токен>)
+METRICS_ENABLED = True
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Журнал медленных SQL запросов (api/slowlog.py), None отключает журнал.
+# Значения параметров запросов могут содержать личные данные и пишутся
+# в журнал только при SLOW_QUERY_LOG_PARAMS
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow_queries.jsonl')
+SLOW_QUERY_EXPLAIN = True
+SLOW_QUERY_LOG_PARAMS = False
+
+# Очередь записи с одним потоком-писателем (api/writer.py): пачка
+# до WRITE_QUEUE_BATCH_SIZE задач, ожидание следующей задачи пачки (мс)
+# и предельное время ожидания результата вызывающим (с)
+WRITE_QUEUE_ENABLED = os.getenv('WRITE_QUEUE_ENABLED', '') == 'true'
+WRITE_QUEUE_BATCH_SIZE = 64
+WRITE_QUEUE_MAX_WAIT_MS = 2
+WRITE_QUEUE_TIMEOUT = 30
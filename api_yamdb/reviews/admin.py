@@ -2,7 +2,8 @@ from django.contrib import admin
 
 from api_yamdb.settings import EMPTY_VALUE_ADMIN_PANEL
 
-from .models import Category, Comment, CustomUser, Genre, Review, Title
+from .models import (Category, Comment, CustomUser, Genre, OutboxMessage,
+                     Review, Title)
 
 
 @admin.register(CustomUser)
@@ -70,3 +71,19 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('review',)
     list_filter = ('author', 'review')
     empty_value_display = EMPTY_VALUE_ADMIN_PANEL
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Админ панель для очереди исходящих писем."""
+    list_display = (
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    empty_value_display = EMPTY_VALUE_ADMIN_PANEL
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from .search import ensure_search_triggers
+        from .sqlite import apply_pragmas
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
+        connection_created.connect(apply_pragmas)
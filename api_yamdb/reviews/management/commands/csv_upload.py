@@ -1,31 +1,38 @@
 import csv
 import os
+import time
+from itertools import islice
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from reviews.models import (Category, Comment, CustomUser, Genre, GenreTitle,
                             Review, Title)
+from reviews.signals import data_imported
 
+DEFAULT_BATCH_SIZE = 5000
+PROGRESS_INTERVAL = 1
 
-def category_create(row):
-    Category.objects.get_or_create(
+
+def category_from_row(row):
+    return Category(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def genre_create(row):
-    Genre.objects.get_or_create(
+def genre_from_row(row):
+    return Genre(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def titles_create(row):
-    Title.objects.get_or_create(
+def title_from_row(row):
+    return Title(
         id=row[0],
         name=row[1],
         year=row[2],
@@ -33,16 +40,16 @@ def titles_create(row):
     )
 
 
-def genre_title_create(row):
-    GenreTitle.objects.get_or_create(
+def genre_title_from_row(row):
+    return GenreTitle(
         id=row[0],
         genre_id=row[2],
         title_id=row[1],
     )
 
 
-def users_create(row):
-    CustomUser.objects.get_or_create(
+def user_from_row(row):
+    return CustomUser(
         id=row[0],
         username=row[1],
         email=row[2],
@@ -53,8 +60,8 @@ def users_create(row):
     )
 
 
-def review_create(row):
-    Review.objects.get_or_create(
+def review_from_row(row):
+    return Review(
         id=row[0],
         title_id=row[1],
         text=row[2],
@@ -64,8 +71,8 @@ def review_create(row):
     )
 
 
-def comment_create(row):
-    Comment.objects.get_or_create(
+def comment_from_row(row):
+    return Comment(
         id=row[0],
         review_id=row[1],
         text=row[2],
@@ -74,23 +81,129 @@ def comment_create(row):
     )
 
 
-action = {
-    'category.csv': category_create,
-    'genre.csv': genre_create,
-    'titles.csv': titles_create,
-    'genre_title.csv': genre_title_create,
-    'users.csv': users_create,
-    'review.csv': review_create,
-    'comments.csv': comment_create,
-}
+# Порядок загрузки следует зависимостям внешних ключей.
+IMPORT_ORDER = (
+    ('users.csv', CustomUser, user_from_row),
+    ('category.csv', Category, category_from_row),
+    ('genre.csv', Genre, genre_from_row),
+    ('titles.csv', Title, title_from_row),
+    ('genre_title.csv', GenreTitle, genre_title_from_row),
+    ('review.csv', Review, review_from_row),
+    ('comments.csv', Comment, comment_from_row),
+)
+
+
+def read_rows(path):
+    """Потоково читает строки CSV файла, пропуская заголовок."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+
+def batched(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def auto_now_add_fields(model):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+
+
+def bulk_import(rows, model, from_row, batch_size, progress=None):
+    """
+    Сохраняет строки пачками через bulk_create, каждая пачка —
+    отдельная транзакция. Уже существующие записи пропускаются.
+    Даты полей auto_now_add (pub_date) берутся из CSV.
+    progress(rows, elapsed) вызывается не чаще раза в секунду
+    и один раз в конце. Возвращает число обработанных строк.
+    """
+    started = reported = time.monotonic()
+    count = 0
+    dated = auto_now_add_fields(model)
+    for batch in batched(rows, batch_size):
+        objects = [from_row(row) for row in batch]
+        dates = [[getattr(obj, name) for name in dated] for obj in objects]
+        # Размер одного INSERT выбирает бэкенд: в Django 2.2 явный
+        # batch_size не ограничивается лимитами SQLite на число термов.
+        with transaction.atomic():
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            if dated:
+                # bulk_create заменяет даты auto_now_add текущим временем.
+                for obj, values in zip(objects, dates):
+                    for name, value in zip(dated, values):
+                        setattr(obj, name, value)
+                model.objects.bulk_update(objects, dated)
+        count += len(batch)
+        now = time.monotonic()
+        if progress is not None and now - reported >= PROGRESS_INTERVAL:
+            reported = now
+            progress(count, now - started)
+    if progress is not None:
+        progress(count, time.monotonic() - started)
+    return count
+
+
+def finish_import(sender, stdout):
+    """Пересчитывает рейтинг и один раз сообщает о загрузке данных."""
+    with transaction.atomic():
+        updated = Title.objects.rebuild_ratings()
+    stdout.write(f'Пересчитан рейтинг произведений: {updated}')
+    data_imported.send(sender=sender)
 
 
 class Command(BaseCommand):
+    help = (
+        'Загружает данные из CSV файлов пачками через bulk_create, '
+        'каждая пачка — отдельная транзакция.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static/data/'),
+            help='Каталог с CSV файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Число строк в одной пачке.',
+        )
+
     def handle(self, *args, **options):
-        path = os.path.join(settings.BASE_DIR, 'static/data/')
-        for key in action.keys():
-            with open(path + key, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                next(reader)
-                for row in reader:
-                    action[key](row)
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        started = time.monotonic()
+        total = 0
+        for filename, model, from_row in IMPORT_ORDER:
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{filename}: файл не найден, пропущен')
+                continue
+            total += self.import_file(path, model, from_row, batch_size)
+        finish_import(self.__class__, self.stdout)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} строк/с)'
+        ))
+
+    def import_file(self, path, model, from_row, batch_size):
+        filename = os.path.basename(path)
+        return bulk_import(
+            read_rows(path), model, from_row, batch_size,
+            progress=lambda rows, elapsed: self.report(filename, rows, elapsed)
+        )
+
+    def report(self, filename, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f'{filename}: {rows} строк, {rate:.0f} строк/с')
@@ -0,0 +1,261 @@
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import USER_ROLE_ADMIN, USER_ROLE_MODERATOR, USER_ROLE_USER
+
+from .csv_upload import (DEFAULT_BATCH_SIZE, IMPORT_ORDER, bulk_import,
+                         finish_import)
+
+CSV_HEADERS = {
+    'users.csv': ('id', 'username', 'email', 'role', 'bio',
+                  'first_name', 'last_name'),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+}
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'музыка', 'актёр',
+    'режиссёр', 'история', 'драма', 'комедия', 'роман', 'песня', 'альбом',
+    'сцена', 'диалог', 'персонаж', 'атмосфера', 'сценарий', 'автор',
+    'отличный', 'скучный', 'сильный', 'неожиданный', 'красивый', 'долгий',
+    'смешной', 'грустный', 'честный', 'великий', 'странный', 'новый',
+    'понравился', 'разочаровал', 'удивил', 'запомнился', 'рекомендую',
+    'пересмотрю', 'перечитаю', 'советую', 'очень', 'совсем', 'слишком',
+)
+ROLES = (USER_ROLE_USER,) * 97 + (USER_ROLE_MODERATOR,) * 2 + (
+    USER_ROLE_ADMIN,
+)
+# Оценки смещены к высоким, как в реальных каталогах.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 16, 14, 10)
+FIRST_YEAR = 1900
+LAST_YEAR = 2021
+PUB_DATE_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+PUB_DATE_SPAN = int(timedelta(days=365 * 7).total_seconds())
+
+
+def zipf_counts(total, buckets, exponent, capacity, rng):
+    """
+    Распределяет total элементов по buckets корзинам по закону Ципфа
+    (несколько «горячих» корзин получают большую часть), не больше
+    capacity в корзине. Горячие корзины перемешиваются.
+    """
+    weights = [1 / (rank ** exponent) for rank in range(1, buckets + 1)]
+    counts = [0] * buckets
+    remainder = total
+    # Излишек переполненных корзин перераспределяется по остальным.
+    while remainder > 0:
+        open_buckets = [i for i in range(buckets) if counts[i] < capacity]
+        if not open_buckets:
+            break
+        open_weight = sum(weights[i] for i in open_buckets)
+        added = 0
+        for i in open_buckets:
+            extra = min(
+                capacity - counts[i],
+                int(remainder * weights[i] / open_weight),
+            )
+            counts[i] += extra
+            added += extra
+        if not added:
+            for i in open_buckets[:remainder]:
+                counts[i] += 1
+                added += 1
+        remainder -= added
+    rng.shuffle(counts)
+    return counts
+
+
+class DatasetGenerator:
+    """
+    Потоковый генератор синтетических данных в формате csv_upload.
+    Каждый файл генерируется собственным ГПСЧ, производным от seed,
+    поэтому данные не зависят от режима вывода и порядка чтения.
+    """
+
+    def __init__(self, seed, users, categories, genres, titles, reviews,
+                 comments, skew):
+        self.seed = seed
+        self.users = users
+        self.categories = categories
+        self.genres = genres
+        self.titles = titles
+        self.reviews = reviews
+        self.comments = comments
+        self.skew = skew
+
+    def rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    @staticmethod
+    def text(rng, min_words, max_words):
+        words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+        return ' '.join(words).capitalize() + '.'
+
+    @staticmethod
+    def pub_date(rng):
+        moment = PUB_DATE_START + timedelta(
+            seconds=rng.randrange(PUB_DATE_SPAN)
+        )
+        return moment.isoformat(timespec='milliseconds').replace(
+            '+00:00', 'Z'
+        )
+
+    def rows(self, filename):
+        generators = {
+            'users.csv': self.user_rows,
+            'category.csv': self.category_rows,
+            'genre.csv': self.genre_rows,
+            'titles.csv': self.title_rows,
+            'genre_title.csv': self.genre_title_rows,
+            'review.csv': self.review_rows,
+            'comments.csv': self.comment_rows,
+        }
+        return generators[filename](self.rng(filename))
+
+    def user_rows(self, rng):
+        for pk in range(1, self.users + 1):
+            yield (pk, f'user{pk}', f'user{pk}@yamdb.fake', rng.choice(ROLES),
+                   '', '', '')
+
+    def category_rows(self, rng):
+        for pk in range(1, self.categories + 1):
+            yield (pk, f'Категория {pk}', f'category-{pk}')
+
+    def genre_rows(self, rng):
+        for pk in range(1, self.genres + 1):
+            yield (pk, f'Жанр {pk}', f'genre-{pk}')
+
+    def title_rows(self, rng):
+        for pk in range(1, self.titles + 1):
+            category = (
+                rng.randint(1, self.categories) if self.categories else ''
+            )
+            yield (pk, self.text(rng, 1, 4).rstrip('.'),
+                   rng.randint(FIRST_YEAR, LAST_YEAR), category)
+
+    def genre_title_rows(self, rng):
+        if not self.genres:
+            return
+        pk = 0
+        for title in range(1, self.titles + 1):
+            count = rng.randint(1, min(3, self.genres))
+            for genre in rng.sample(range(1, self.genres + 1), count):
+                pk += 1
+                yield (pk, title, genre)
+
+    def review_counts(self):
+        return zipf_counts(
+            self.reviews, self.titles, self.skew, self.users,
+            self.rng('review-counts'),
+        )
+
+    def review_rows(self, rng):
+        if not self.titles or not self.users:
+            return
+        pk = 0
+        for title, count in enumerate(self.review_counts(), start=1):
+            for author in rng.sample(range(1, self.users + 1), count):
+                pk += 1
+                yield (pk, title, self.text(rng, 5, 40), author,
+                       rng.choices(range(1, 11), SCORE_WEIGHTS)[0],
+                       self.pub_date(rng))
+
+    def comment_rows(self, rng):
+        reviews = sum(self.review_counts()) if self.titles else 0
+        if not reviews or not self.users:
+            return
+        for pk in range(1, self.comments + 1):
+            # Квадрат равномерной величины концентрирует комментарии
+            # на части отзывов, как и в реальных обсуждениях.
+            review = 1 + int(reviews * rng.random() ** 2)
+            yield (pk, review, self.text(rng, 3, 20),
+                   rng.randint(1, self.users), self.pub_date(rng))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетический набор данных для нагрузочного '
+        'тестирования: в БД (через bulk_create) или в CSV для csv_upload.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для отзывов; 0 — равномерно.',
+        )
+        parser.add_argument('--seed', default='yamdb')
+        parser.add_argument(
+            '--output', choices=('db', 'csv'), default='db',
+        )
+        parser.add_argument(
+            '--path', help='Каталог для CSV файлов при --output=csv.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        counts = ('users', 'categories', 'genres', 'titles', 'reviews',
+                  'comments')
+        if any(options[name] < 0 for name in counts):
+            raise CommandError('Количество записей не может быть меньше 0.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        if options['output'] == 'csv' and not options['path']:
+            raise CommandError('Для --output=csv нужен --path.')
+        generator = DatasetGenerator(
+            seed=options['seed'], skew=options['skew'],
+            **{name: options[name] for name in counts},
+        )
+        started = time.monotonic()
+        total = 0
+        for filename, model, from_row in IMPORT_ORDER:
+            if options['output'] == 'csv':
+                total += self.write_csv(generator, filename, options['path'])
+            else:
+                total += bulk_import(
+                    generator.rows(filename), model, from_row,
+                    options['batch_size'],
+                    progress=lambda rows, elapsed, name=filename: (
+                        self.report(name, rows, elapsed)
+                    ),
+                )
+        if options['output'] == 'db':
+            finish_import(self.__class__, self.stdout)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Сгенерировано строк: {total} за {elapsed:.1f} с'
+        ))
+
+    def write_csv(self, generator, filename, path):
+        os.makedirs(path, exist_ok=True)
+        started = time.monotonic()
+        rows = 0
+        with open(os.path.join(path, filename), 'w', encoding='utf-8',
+                  newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADERS[filename])
+            for row in generator.rows(filename):
+                writer.writerow(row)
+                rows += 1
+        self.report(filename, rows, time.monotonic() - started)
+        return rows
+
+    def report(self, filename, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f'{filename}: {rows} строк, {rate:.0f} строк/с')
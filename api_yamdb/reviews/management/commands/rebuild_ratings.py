@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.signals import data_imported
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сумму оценок и число отзывов произведений '
+        'по таблице отзывов. Нужна после массовой загрузки данных.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+        data_imported.send(sender=self.__class__)
+        self.stdout.write(f'Пересчитан рейтинг произведений: {updated}')
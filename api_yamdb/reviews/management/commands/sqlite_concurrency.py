@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.sqlite import pragma_statements
+
+# Таблица повторяет горячую часть схемы отзывов.
+SCHEMA = (
+    'CREATE TABLE reviews (id INTEGER PRIMARY KEY, title_id INTEGER, '
+    'text TEXT, score INTEGER, pub_date REAL)',
+    'CREATE INDEX reviews_title ON reviews (title_id)',
+)
+READ_SQL = (
+    'SELECT id, text, score FROM reviews WHERE title_id = ? '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE_SQL = (
+    'INSERT INTO reviews (title_id, text, score, pub_date) '
+    'VALUES (?, ?, ?, ?)'
+)
+# Как у Django по умолчанию: ожидание блокировки 5 секунд.
+DEFAULT_TIMEOUT = 5.0
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий чтения или записи до истечения времени."""
+
+    def __init__(self, path, pragmas, write, deadline, number):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pragmas = pragmas
+        self.write = write
+        self.deadline = deadline
+        self.number = number
+        self.operations = 0
+        self.errors = 0
+        self.latencies = []
+
+    def run(self):
+        # isolation_level=None: автокоммит, как у соединений Django.
+        db = sqlite3.connect(
+            self.path, timeout=DEFAULT_TIMEOUT, isolation_level=None,
+            check_same_thread=False,
+        )
+        for statement in pragma_statements(self.pragmas):
+            db.execute(statement)
+        iteration = 0
+        while time.monotonic() < self.deadline:
+            iteration += 1
+            started = time.perf_counter()
+            try:
+                self.execute(db, iteration)
+            except sqlite3.OperationalError:
+                self.errors += 1
+                continue
+            self.latencies.append(time.perf_counter() - started)
+            self.operations += 1
+        db.close()
+
+    def execute(self, db, iteration):
+        title_id = (self.number * 7919 + iteration) % 100
+        if self.write:
+            db.execute('BEGIN')
+            try:
+                db.execute(
+                    WRITE_SQL, (title_id, 'текст отзыва', 7, time.time())
+                )
+                db.execute('COMMIT')
+            except sqlite3.OperationalError:
+                db.execute('ROLLBACK')
+                raise
+        else:
+            db.execute(READ_SQL, (title_id,)).fetchall()
+
+
+def run_mode(pragmas, readers, writers, seconds, rows):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        db = sqlite3.connect(path, isolation_level=None)
+        for statement in (*pragma_statements(pragmas), *SCHEMA):
+            db.execute(statement)
+        db.executemany(WRITE_SQL, (
+            (number % 100, 'текст отзыва', 5, number) for number in range(rows)
+        ))
+        db.close()
+        deadline = time.monotonic() + seconds
+        workers = [
+            Worker(path, pragmas, number < writers, deadline, number)
+            for number in range(readers + writers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return summarize(workers, seconds)
+
+
+def summarize(workers, seconds):
+    result = {}
+    for kind, write in (('reads', False), ('writes', True)):
+        group = [worker for worker in workers if worker.write == write]
+        latencies = sorted(
+            latency for worker in group for latency in worker.latencies
+        )
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+        result[kind] = {
+            'per_second': sum(worker.operations for worker in group) / seconds,
+            'errors': sum(worker.errors for worker in group),
+            'p99_ms': p99 * 1000,
+        }
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает параллельные чтения и записи SQLite с настройками '
+        'по умолчанию (журнал отката) и с SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if options['seconds'] <= 0 or options['readers'] + options[
+            'writers'
+        ] < 1:
+            raise CommandError('Нужны потоки и положительная длительность.')
+        modes = (
+            ('по умолчанию', {'journal_mode': 'DELETE'}),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+        )
+        for name, pragmas in modes:
+            result = run_mode(
+                pragmas, options['readers'], options['writers'],
+                options['seconds'], options['rows'],
+            )
+            self.stdout.write(self.style.SUCCESS(name))
+            for kind in ('reads', 'writes'):
+                stats = result[kind]
+                self.stdout.write(
+                    f'  {kind}: {stats["per_second"]:.0f}/с, '
+                    f'p99 {stats["p99_ms"]:.1f} мс, '
+                    f'ошибок блокировки {stats["errors"]}'
+                )
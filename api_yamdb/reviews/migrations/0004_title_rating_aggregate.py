@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def rebuild_ratings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_auto_20220306_1632'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name='Количество отзывов',
+            ),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name='Сумма оценок',
+            ),
+        ),
+        migrations.RunPython(rebuild_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 10:00
+
+from django.db import migrations
+
+CREATE_SEARCH_INDEXES = (
+    "CREATE VIRTUAL TABLE titles_fts USING fts5("
+    "name, description, content='titles', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE reviews_fts USING fts5("
+    "text, content='reviews', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER titles_fts_ai AFTER INSERT ON titles BEGIN "
+    "INSERT INTO titles_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER titles_fts_ad AFTER DELETE ON titles BEGIN "
+    "INSERT INTO titles_fts(titles_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER titles_fts_au AFTER UPDATE OF name, description "
+    "ON titles BEGIN "
+    "INSERT INTO titles_fts(titles_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO titles_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER reviews_fts_ai AFTER INSERT ON reviews BEGIN "
+    "INSERT INTO reviews_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER reviews_fts_ad AFTER DELETE ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER reviews_fts_au AFTER UPDATE OF text ON reviews BEGIN "
+    "INSERT INTO reviews_fts(reviews_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO reviews_fts(rowid, text) VALUES (new.id, new.text); END",
+    "INSERT INTO titles_fts(titles_fts) VALUES ('rebuild')",
+    "INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')",
+)
+
+DROP_SEARCH_INDEXES = (
+    'DROP TRIGGER IF EXISTS titles_fts_ai',
+    'DROP TRIGGER IF EXISTS titles_fts_ad',
+    'DROP TRIGGER IF EXISTS titles_fts_au',
+    'DROP TRIGGER IF EXISTS reviews_fts_ai',
+    'DROP TRIGGER IF EXISTS reviews_fts_ad',
+    'DROP TRIGGER IF EXISTS reviews_fts_au',
+    'DROP TABLE IF EXISTS titles_fts',
+    'DROP TABLE IF EXISTS reviews_fts',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_rating_aggregate'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='search_text_idx',
+        ),
+        migrations.RunSQL(CREATE_SEARCH_INDEXES, DROP_SEARCH_INDEXES),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='tokens_revoked_at',
+            field=models.DateTimeField(blank=True, help_text='Токены, выпущенные раньше, отклоняются', null=True, verbose_name='Токены отозваны'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+# Таблица модели -> (индексируемые колонки, веса колонок для bm25).
+# Индексы FTS5 хранят только токены, сами тексты остаются в таблице
+# модели (external content), синхронизация выполняется триггерами.
+SEARCH_INDEXES = {
+    'titles': (('name', 'description'), (10.0, 1.0)),
+    'reviews': (('text',), (1.0,)),
+}
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table_name(table):
+    return f'{table}_fts'
+
+
+def search_trigger_sql(table):
+    """SQL триггеров, поддерживающих FTS5 индекс таблицы в актуальном виде."""
+    columns, _ = SEARCH_INDEXES[table]
+    fts_table = fts_table_name(table)
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = (
+        f'INSERT INTO {fts_table}(rowid, {names}) '
+        f'VALUES (new.id, {new_values});'
+    )
+    return (
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT '
+        f'ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE '
+        f'ON {table} BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE '
+        f'OF {names} ON {table} BEGIN {delete_old} {insert_new} END',
+    )
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """
+    Восстанавливает триггеры FTS5 после миграций.
+    SQLite пересоздаёт таблицу при изменении схемы и теряет её триггеры,
+    поэтому обработчик подключён к сигналу post_migrate.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    existing = set(db.introspection.table_names())
+    with db.cursor() as cursor:
+        for table in SEARCH_INDEXES:
+            if fts_table_name(table) not in existing:
+                continue
+            for statement in search_trigger_sql(table):
+                cursor.execute(statement)
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5:
+    каждое слово ищется по префиксу, слова объединяются через AND.
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def full_text_search(queryset, query):
+    """
+    Фильтрует queryset по полнотекстовому индексу
+    и сортирует результат по релевантности (bm25).
+    """
+    table = queryset.model._meta.db_table
+    columns, weights = SEARCH_INDEXES[table]
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    if connections[queryset.db].vendor != 'sqlite':
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f'{column}__icontains': query})
+        return queryset.filter(condition)
+    fts_table = fts_table_name(table)
+    rank = 'bm25({}, {})'.format(
+        fts_table, ', '.join(str(weight) for weight in weights)
+    )
+    return queryset.extra(
+        tables=[fts_table],
+        where=[f'{fts_table}.rowid = {table}.id', f'{fts_table} MATCH %s'],
+        params=[match],
+        select={'search_rank': rank},
+        order_by=['search_rank'],
+    )
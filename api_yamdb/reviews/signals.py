@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Отправляется после массовой загрузки данных в обход save() и сигналов
+# моделей, чтобы зависимые кэши могли сброситься целиком.
+data_imported = Signal()
+
+# Отправляется после GenreTitle.objects.sync(): связи меняются массово,
+# без сигналов модели. title_ids — произведения с изменёнными жанрами.
+genres_synced = Signal(providing_args=['title_ids'])
@@ -0,0 +1,65 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def pragma_statements(pragmas):
+    """
+    SQL для настроек соединения SQLite из словаря {имя: значение}.
+    Имена и значения проверяются, так как PRAGMA не принимает параметры.
+    """
+    statements = []
+    for name, value in pragmas.items():
+        value = str(value)
+        if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(value):
+            raise ValueError(f'Недопустимая настройка SQLite: {name}={value}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite
+    (сигнал connection_created).
+    journal_mode=WAL хранится в файле БД, остальные настройки действуют
+    в пределах соединения, поэтому выполняются при каждом подключении.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PRAGMAS
+    if connection.alias in settings.REPLICA_DATABASES:
+        # Реплику заменяет sync_replicas, WAL файлы старой и новой копии
+        # совпадали бы по имени (см. команду sync_replicas).
+        pragmas = {
+            name: value for name, value in pragmas.items()
+            if name != 'journal_mode'
+        }
+    # Соединение драйвера: настройка не считается запросом приложения.
+    for statement in pragma_statements(pragmas):
+        connection.connection.execute(statement)
+
+
+def lock_for_write(model, using=None):
+    """
+    Берёт блокировку записи в начале текущей транзакции SQLite.
+    Транзакция Django начинается отложенной (BEGIN): если она сначала
+    читает, а другой процесс успевает зафиксировать запись, первая
+    запись этой транзакции завершится SQLITE_BUSY_SNAPSHOT без ожидания.
+    Пустой UPDATE сразу берёт блокировку, и дальнейшие чтения видят
+    последние зафиксированные данные. На других БД ничего не делает:
+    там строки блокирует select_for_update().
+    """
+    connection = connections[using or router.db_for_write(model)]
+    if connection.vendor != 'sqlite':
+        return
+    quote = connection.ops.quote_name
+    column = quote(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(model._meta.db_table)} '
+            f'SET {column} = {column} WHERE 0'
+        )
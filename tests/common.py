@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -76,6 +81,21 @@ def create_titles(admin_client):
     return result, categories, genres
 
 
+def create_many_titles(admin_client, count):
+    genres = create_genre(admin_client)
+    categories = create_categories(admin_client)
+    for number in range(count):
+        data = {
+            'name': f'Произведение {number}',
+            'year': 2000,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[number % 2]['slug'],
+            'description': 'Описание',
+        }
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+
+
 def create_reviews(admin_client, admin):
     def create_review(uclient, title_id, text, score):
         data = {'text': text, 'score': score}
@@ -113,3 +133,23 @@ def create_comments(admin_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def run_in_other_process(code):
+    """
+    Выполняет код в отдельном процессе Django (другом «воркере»)
+    с тем же общим кэшем, что и у теста.
+    """
+    manage_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'api_yamdb',
+    )
+    env = {
+        **os.environ,
+        'CACHE_BACKEND': settings.CACHES['default']['BACKEND'],
+        'CACHE_LOCATION': settings.CACHES['default']['LOCATION'],
+    }
+    subprocess.run(
+        [sys.executable, 'manage.py', 'shell', '-c', code],
+        cwd=manage_dir, env=env, check=True,
+    )
@@ -33,4 +33,8 @@ assert get_version() < '3.0.0', 'Пожалуйста, используйте в
 
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_query_budget',
+    'tests.fixtures.fixture_throttle',
+    'tests.fixtures.fixture_metrics',
 ]
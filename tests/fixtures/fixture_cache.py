@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path_factory):
+    """Пустой общий файловый кэш в отдельном каталоге на каждый тест."""
+    settings.CACHES = {
+        'default': {
+            **settings.CACHES['default'],
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path_factory.mktemp('cache')),
+        }
+    }
+    return settings.CACHES['default']['LOCATION']
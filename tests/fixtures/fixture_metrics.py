@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    from api.metrics import empty_snapshot, registry
+
+    monkeypatch.setattr(registry, 'data', empty_snapshot())
+    return registry
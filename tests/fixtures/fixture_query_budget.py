@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    settings.QUERY_BUDGET_ENABLED = True
+    settings.QUERY_BUDGET_SAMPLE_RATE = 1
+    settings.QUERY_BUDGET_RAISE = True
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def throttle_db(settings, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('throttle')
+    settings.THROTTLE_DB = str(directory / 'throttle.sqlite3')
+    return settings.THROTTLE_DB
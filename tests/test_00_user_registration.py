@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.management import call_command
 
 User = get_user_model()
 
@@ -85,6 +86,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = client.post(self.url_signup, data=valid_data)
+        call_command('send_outbox')  # письма отправляются из очереди
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != 404, (
@@ -132,6 +134,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = admin_client.post(self.url_admin_create_user, data=valid_data)
+        call_command('send_outbox')
         outbox_after = mail.outbox
 
         assert response.status_code != 404, (
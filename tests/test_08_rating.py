@@ -0,0 +1,86 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_reviews
+
+
+class Test08RatingAggregate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_review_changes(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются '
+            '`score_sum` и `review_count` произведения'
+        )
+
+        client_user = auth_client(user)
+        response = client_user.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва '
+            'пересчитывается `score_sum` произведения'
+        )
+
+        response = admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (13, 2), (
+            'Проверьте, что при удалении отзыва уменьшаются '
+            '`score_sum` и `review_count` произведения'
+        )
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (4, 1), (
+            'Проверьте, что при удалении пользователя рейтинг '
+            'произведений с его отзывами пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(score_sum=0, review_count=0)
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что команда `rebuild_ratings` восстанавливает '
+            'агрегаты рейтинга по таблице отзывов'
+        )
+        empty_title = Title.objects.get(pk=titles[1]['id'])
+        assert empty_title.rating is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_update_writes_first(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client(user).patch(url, data={'score': 9})
+        assert response.status_code == 200
+        statements = [query['sql'] for query in context.captured_queries]
+        begin = next(
+            index for index, sql in enumerate(statements)
+            if sql.startswith('BEGIN')
+        )
+        assert statements[begin + 1].startswith('UPDATE'), (
+            'Проверьте, что транзакция изменения отзыва сначала берёт '
+            'блокировку записи, а потом читает старую оценку'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (18, 3)
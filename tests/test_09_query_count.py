@@ -0,0 +1,83 @@
+import pytest
+
+from .common import create_many_titles, create_reviews
+
+
+class Test09QueryCount:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('count', (1, 5))
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries, count):
+        create_many_titles(admin_client, count)
+        # count(*), страница произведений с категориями, жанры страницы
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == count, (
+            'Проверьте, что число запросов к БД при GET запросе '
+            '`/api/v1/titles/` не зависит от размера страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        create_many_titles(admin_client, 1)
+        title_id = admin_client.get('/api/v1/titles/').json()['results'][0]['id']
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('count', (1, 6))
+    def test_03_reviews_and_comments_queries(self, client, admin_client,
+                                             django_user_model,
+                                             django_assert_num_queries,
+                                             count):
+        from reviews.models import Comment, Review, Title
+
+        create_many_titles(admin_client, 1)
+        title = Title.objects.get()
+        review = None
+        for number in range(count):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=title, author=author, text='text', score=5
+            )
+            Comment.objects.create(review=review, author=author, text='text')
+        for _ in range(count):
+            Comment.objects.create(review=review, author=author, text='text')
+
+        # произведение, count(*), страница отзывов с авторами
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['count'] == count, (
+            'Проверьте, что число запросов к БД при GET запросе отзывов '
+            'не зависит от числа отзывов'
+        )
+        # отзыв вместе с проверкой произведения, count(*), страница
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            )
+        assert response.status_code == 200
+        assert response.json()['count'] == count + 1, (
+            'Проверьте, что число запросов к БД при GET запросе комментариев '
+            'не зависит от числа комментариев'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_comments_of_foreign_review(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии отзыва запрашиваются '
+            'только в рамках его произведения'
+        )
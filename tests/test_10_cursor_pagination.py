@@ -0,0 +1,79 @@
+import pytest
+
+from .common import create_many_titles
+
+
+def walk_cursor(client, url):
+    names = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что курсорная пагинация не считает COUNT(*)'
+        )
+        names.extend(data['results'])
+        url = data['next']
+        pages += 1
+    return names, pages
+
+
+class Test10CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client, admin_client):
+        create_many_titles(admin_client, 7)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 7, (
+            'Проверьте, что без параметра `pagination` '
+            'сохраняется постраничная пагинация'
+        )
+        results, pages = walk_cursor(
+            client, '/api/v1/titles/?pagination=cursor'
+        )
+        assert pages == 2
+        assert [title['name'] for title in results] == sorted(
+            f'Произведение {number}' for number in range(7)
+        ), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'возвращает все произведения в порядке (name, year) без повторов'
+        )
+
+        first_page = client.get('/api/v1/titles/?pagination=cursor').json()
+        second_page = client.get(first_page['next']).json()
+        previous_page = client.get(second_page['previous']).json()
+        assert previous_page['results'] == first_page['results']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cursor(self, client, admin_client,
+                               django_user_model):
+        from reviews.models import Review, Title
+
+        create_many_titles(admin_client, 1)
+        title = Title.objects.get()
+        for number in range(12):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='text', score=5
+            )
+        results, pages = walk_cursor(
+            client, f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        )
+        assert pages == 3
+        expected = list(
+            Review.objects.order_by('-pub_date', 'author', '-pk')
+            .values_list('id', flat=True)
+        )
+        assert [review['id'] for review in results] == expected, (
+            'Проверьте, что курсорная пагинация отзывов '
+            'следует сортировке (-pub_date, author)'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_cursor(self, client, admin_client):
+        create_many_titles(admin_client, 1)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
@@ -0,0 +1,71 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test11FullTextSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/?q=повор')
+        assert response.status_code == 200
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [titles[0]['id']], (
+            'Проверьте, что `?q=` на `/api/v1/titles/` ищет по названию '
+            'произведения с учётом префикса слова'
+        )
+        response = client.get('/api/v1/titles/?q=драма')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], 'Проверьте, что `?q=` ищет и по описанию произведения'
+
+        response = client.get('/api/v1/titles/?q="драма OR (')
+        assert response.status_code == 200, (
+            'Проверьте, что спецсимволы в `?q=` не ломают запрос'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Разворот'}
+        )
+        assert client.get('/api/v1/titles/?q=поворот').json()['count'] == 0
+        assert client.get('/api/v1/titles/?q=разворот').json()['count'] == 1
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get('/api/v1/titles/?q=разворот').json()['count'] == 0, (
+            'Проверьте, что полнотекстовый индекс обновляется '
+            'при изменении и удалении произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_ranking(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'description': 'Проект года'}
+        )
+        response = client.get('/api/v1/titles/?q=проект')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews_search(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url + '?q=qwerty123')
+        assert response.status_code == 200
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[1]['id']
+        ], 'Проверьте, что `?q=` ищет по тексту отзывов'
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/?q=qwerty'
+        )
+        assert response.json()['count'] == 0, (
+            'Проверьте, что поиск по отзывам ограничен произведением'
+        )
@@ -0,0 +1,151 @@
+import os
+
+import pytest
+from django.core.management import call_command
+
+from .common import (auth_client, create_titles, create_users_api,
+                     run_in_other_process)
+
+
+class Test12ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_anonymous_hit(self, client, admin_client,
+                              django_assert_num_queries):
+        create_titles(admin_client)
+        first = client.get('/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/')
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный GET запрос `/api/v1/titles/` '
+            'обслуживается из кэша без запросов к БД'
+        )
+        assert second.json() == first.json()
+        third = client.get('/api/v1/titles/?year=2000')
+        assert third['X-Cache'] == 'MISS', (
+            'Проверьте, что параметры запроса входят в ключ кэша'
+        )
+        same = client.get('/api/v1/titles/?year=2000&name=')
+        other_order = client.get('/api/v1/titles/?name=&year=2000')
+        assert same['X-Cache'] == 'MISS'
+        assert other_order['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок параметров запроса не влияет на ключ'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_authenticated_bypass(self, admin_client):
+        create_titles(admin_client)
+        admin_client.get('/api/v1/titles/')
+        response = admin_client.get('/api/v1/titles/')
+        assert not response.has_header('X-Cache'), (
+            'Проверьте, что ответы аутентифицированным пользователям '
+            'не кэшируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_writes_invalidate(self, client, admin_client):
+        titles, categories, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        client.get(url)
+        client.get(other_url)
+        client.get('/api/v1/genres/')
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(
+            url + 'reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш карточки произведения'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что запись сбрасывает только затронутые ответы'
+        )
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        response = client.get(url)
+        assert response.json()['category'] is None, (
+            'Проверьте, что удаление категории сбрасывает кэш произведений'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT'
+
+        admin_client.patch(url, data={'genre': ['drama']})
+        response = client.get(url)
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ], 'Проверьте, что изменение жанров сбрасывает кэш произведения'
+
+        admin_client.delete('/api/v1/genres/drama/')
+        assert client.get(url).json()['genre'] == []
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_stats_command(self, client, admin_client, capsys,
+                              fresh_registry, settings, tmp_path):
+        from api.metrics import empty_snapshot, write_snapshot
+
+        settings.METRICS_DIR = str(tmp_path)
+        other = empty_snapshot()
+        other['cache']['titles\thit'] = 2
+        write_snapshot(
+            str(tmp_path / f'metrics-{os.getppid()}-other.json'), other
+        )
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        call_command('response_cache_stats')
+        assert 'titles: hits=3 misses=1' in capsys.readouterr().out, (
+            'Проверьте, что команда суммирует счётчики кэша ответов '
+            'из метрик всех процессов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_invalidation_shared_between_processes(self, client,
+                                                      admin_client):
+        from api.checks import check_shared_caches
+
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'HIT'
+        run_in_other_process(
+            "from api.cache import bump_versions; bump_versions(('titles',))"
+        )
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS', (
+            'Проверьте, что запись, обработанная другим процессом, '
+            'сбрасывает кэш ответов во всех процессах'
+        )
+        assert not check_shared_caches(None)
+
+    def test_06_process_local_cache_rejected(self, settings):
+        from api.checks import check_shared_caches
+
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        errors = check_shared_caches(None)
+        assert errors and {error.id for error in errors} == {'api.E001'}, (
+            'Проверьте, что процессно-локальный кэш ответов '
+            'не проходит проверку настроек'
+        )
+
+    def test_07_bulk_invalidation_without_writes(self, clear_cache):
+        import os
+
+        from api.cache import bump_versions, get_versions
+
+        scopes = [f'title:{pk}' for pk in range(1200)]
+        before = get_versions(scopes[:3])
+        files = len(os.listdir(clear_cache))
+        bump_versions(scopes)
+        assert len(os.listdir(clear_cache)) < files, (
+            'Проверьте, что сдвиг версий удаляет ключи версий, а не '
+            'записывает по файлу кэша на каждую область'
+        )
+        after = get_versions(scopes[:3])
+        assert all(after[scope] > before[scope] for scope in before), (
+            'Проверьте, что после сдвига версии областей новые'
+        )
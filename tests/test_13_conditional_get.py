@@ -0,0 +1,149 @@
+import pytest
+from django.utils.http import http_date
+
+from .common import create_comments, create_titles, run_in_other_process
+
+
+class Test13ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_detail_etag(self, client, admin_client,
+                                  django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"') and response.has_header('Last-Modified'), (
+            'Проверьте, что GET запрос карточки произведения '
+            'возвращает заголовки `ETag` и `Last-Modified`'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении `If-None-Match` возвращается 304 '
+            'без обращения к БД'
+        )
+        assert not response.content
+
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+        admin_client.patch(url, data={'name': 'Новое название'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет его `ETag`'
+        )
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_and_comment_lists(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        reviews_etag = client.get(reviews_url)['ETag']
+        comments_etag = client.get(comments_url)['ETag']
+
+        admin_client.post(comments_url, data={'text': 'Новый комментарий'})
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        ).status_code == 304
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comments_etag
+        ).status_code == 200, (
+            'Проверьте, что новый комментарий меняет `ETag` списка комментариев'
+        )
+
+        admin_client.patch(
+            f'{reviews_url}{reviews[0]["id"]}/', data={'text': 'Правка'}
+        )
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        ).status_code == 200, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов'
+        )
+
+        reviews_etag = client.get(reviews_url)['ETag']
+        user.username = 'RenamedUser'
+        user.save()
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        ).status_code == 200, (
+            'Проверьте, что смена имени автора меняет `ETag` списка отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_genre_and_category_lists(self, client, admin_client):
+        create_titles(admin_client)
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            etag = client.get(url)['ETag']
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+            assert client.get(
+                url + '?page=2', HTTP_IF_NONE_MATCH=etag
+            ).status_code != 304, (
+                'Проверьте, что `ETag` зависит от параметров запроса'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_write_in_other_process_changes_etag(self, client,
+                                                    admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        run_in_other_process(
+            'from api.cache import bump_versions; '
+            f'bump_versions(("title:{titles[0]["id"]}",))'
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что запись, обработанная другим процессом, '
+            'меняет `ETag` во всех процессах'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_missing_parent_is_not_modified_404(self, client,
+                                                   admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        future = http_date(2 ** 33)
+        urls = (
+            '/api/v1/titles/999999/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/999999/comments/',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+        )
+        for url in urls:
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=future)
+            assert response.status_code == 404, (
+                'Проверьте, что для несуществующего родительского объекта '
+                'вместо 304 возвращается 404'
+            )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=future)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_wildcard_on_missing_object_404(self, client, admin_client,
+                                                admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        comment_url = f'{review_url}comments/{comments[0]["id"]}/'
+        for url in (title_url, review_url, comment_url):
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == 304, (
+                'Проверьте, что `If-None-Match: *` для существующего '
+                'объекта возвращает 304'
+            )
+        urls = (
+            '/api/v1/titles/999999/',
+            f'{title_url}reviews/999999/',
+            f'{review_url}comments/999999/',
+        )
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == 404, (
+                'Проверьте, что `If-None-Match: *` для несуществующего '
+                'объекта возвращает 404, а не 304'
+            )
@@ -0,0 +1,107 @@
+import csv
+
+import pytest
+from django.core.management import call_command
+
+
+class Test14CsvUpload:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_upload_static_data(self, capsys):
+        from reviews.models import (Comment, CustomUser, Genre, GenreTitle,
+                                    Review, Title)
+
+        call_command('csv_upload', '--batch-size', '7')
+        counts = (
+            CustomUser.objects.count(), Genre.objects.count(),
+            Title.objects.count(), GenreTitle.objects.count(),
+            Review.objects.count(), Comment.objects.count(),
+        )
+        assert counts == (5, 15, 32, 42, 72, 3), (
+            'Проверьте, что команда `csv_upload` загружает все строки CSV'
+        )
+        output = capsys.readouterr().out
+        assert 'review.csv: 72 строк' in output, (
+            'Проверьте, что команда `csv_upload` сообщает о прогрессе загрузки'
+        )
+
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count(), (
+            'Проверьте, что после загрузки пересчитывается рейтинг'
+        )
+
+        call_command('csv_upload')
+        assert Review.objects.count() == 72, (
+            'Проверьте, что повторная загрузка не создаёт дубликаты'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_upload_invalidates_cache(self, client):
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 0
+        call_command('csv_upload')
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 32, (
+            'Проверьте, что загрузка данных сбрасывает кэш ответов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_default_batch_size_large_files(self, tmp_path):
+        from reviews.management.commands.csv_upload import DEFAULT_BATCH_SIZE
+        from reviews.models import CustomUser, Genre
+
+        count = 1200
+        files = {
+            'users.csv': (
+                ('id', 'username', 'email', 'role', 'bio', 'first_name',
+                 'last_name'),
+                [(pk, f'user{pk}', f'user{pk}@yamdb.fake', 'user', '', '', '')
+                 for pk in range(1, count + 1)],
+            ),
+            'genre.csv': (
+                ('id', 'name', 'slug'),
+                [(pk, f'Жанр {pk}', f'genre-{pk}')
+                 for pk in range(1, count + 1)],
+            ),
+        }
+        for filename, (header, rows) in files.items():
+            with open(tmp_path / filename, 'w', encoding='utf-8',
+                      newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        assert DEFAULT_BATCH_SIZE > count
+        call_command('csv_upload', '--path', str(tmp_path))
+        assert CustomUser.objects.count() == count, (
+            'Проверьте, что `csv_upload` с размером пачки по умолчанию '
+            'загружает файлы больше лимита переменных SQLite'
+        )
+        assert Genre.objects.count() == count
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_keeps_dates_and_signals_once(self):
+        from datetime import datetime, timezone
+
+        from reviews.models import Comment, Review
+        from reviews.signals import data_imported
+
+        received = []
+
+        def receiver(sender, **kwargs):
+            received.append(sender)
+
+        data_imported.connect(receiver)
+        try:
+            call_command('csv_upload')
+        finally:
+            data_imported.disconnect(receiver)
+        assert len(received) == 1, (
+            'Проверьте, что `csv_upload` отправляет `data_imported` '
+            'один раз после загрузки всех файлов'
+        )
+        assert Review.objects.get(pk=1).pub_date == datetime(
+            2019, 9, 24, 21, 8, 21, 567000, tzinfo=timezone.utc
+        ), 'Проверьте, что `csv_upload` сохраняет дату отзыва из CSV'
+        assert Comment.objects.get(pk=1).pub_date == datetime(
+            2020, 1, 13, 23, 20, 2, 422000, tzinfo=timezone.utc
+        ), 'Проверьте, что `csv_upload` сохраняет дату комментария из CSV'
@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+
+GENERATE_ARGS = (
+    '--users', '40', '--categories', '3', '--genres', '5', '--titles', '20',
+    '--reviews', '300', '--comments', '50', '--seed', 'test',
+)
+
+
+class Test15GenerateData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_into_db(self):
+        from reviews.models import Comment, CustomUser, Review, Title
+
+        call_command('generate_data', *GENERATE_ARGS, '--batch-size', '64')
+        assert CustomUser.objects.count() == 40
+        assert Title.objects.count() == 20
+        assert Review.objects.count() == 300
+        assert Comment.objects.count() == 50
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True), reverse=True
+        )
+        assert counts[0] == 40 and counts[-1] < counts[0] // 4, (
+            'Проверьте, что отзывы распределяются неравномерно: '
+            'у горячих произведений их гораздо больше'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_csv_output_is_reproducible(self, tmp_path):
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        call_command('generate_data', *GENERATE_ARGS,
+                     '--output', 'csv', '--path', str(first))
+        call_command('generate_data', *GENERATE_ARGS,
+                     '--output', 'csv', '--path', str(second))
+        for csv_file in first.iterdir():
+            assert csv_file.read_text(encoding='utf-8') == (
+                second / csv_file.name
+            ).read_text(encoding='utf-8'), (
+                'Проверьте, что одинаковый `--seed` даёт одинаковые данные'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_csv_output_loads_with_csv_upload(self, tmp_path):
+        from reviews.models import GenreTitle, Review
+
+        call_command('generate_data', *GENERATE_ARGS,
+                     '--output', 'csv', '--path', str(tmp_path))
+        call_command('csv_upload', '--path', str(tmp_path))
+        assert Review.objects.count() == 300, (
+            'Проверьте, что CSV файлы генератора загружаются `csv_upload`'
+        )
+        assert GenreTitle.objects.filter(title_id=1).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_db_output_keeps_pub_dates(self):
+        from django.utils.dateparse import parse_datetime
+
+        from reviews.management.commands.generate_data import (
+            DatasetGenerator)
+        from reviews.models import Comment, Review
+
+        call_command('generate_data', *GENERATE_ARGS)
+        generator = DatasetGenerator(
+            seed='test', users=40, categories=3, genres=5, titles=20,
+            reviews=300, comments=50, skew=1.1,
+        )
+        expected = {
+            row[0]: parse_datetime(row[-1])
+            for row in generator.rows('review.csv')
+        }
+        assert dict(Review.objects.values_list('pk', 'pub_date')) == (
+            expected
+        ), (
+            'Проверьте, что `generate_data` сохраняет в БД '
+            'сгенерированные даты отзывов'
+        )
+        expected = {
+            row[0]: parse_datetime(row[-1])
+            for row in generator.rows('comments.csv')
+        }
+        assert dict(Comment.objects.values_list('pk', 'pub_date')) == expected
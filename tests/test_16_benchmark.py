@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+GENERATE_ARGS = (
+    '--users', '10', '--categories', '2', '--genres', '3', '--titles', '5',
+    '--reviews', '20', '--comments', '10', '--seed', 'test',
+)
+BENCHMARK_ARGS = ('--current-db', '--iterations', '2', '--warmup', '1')
+
+
+class Test16Benchmark:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_baseline_covers_router(self, tmp_path):
+        call_command('generate_data', *GENERATE_ARGS)
+        baseline = tmp_path / 'baseline.json'
+        call_command('benchmark', *BENCHMARK_ARGS, '--update-baseline',
+                     '--baseline', str(baseline))
+        results = json.loads(baseline.read_text(encoding='utf-8'))['results']
+        for name in ('users-list', 'users-me', 'titles-list', 'titles-detail',
+                     'reviews-list', 'comments-detail', 'reviews-create'):
+            assert name in results, (
+                f'Проверьте, что бенчмарк измеряет маршрут `{name}`'
+            )
+        assert results['titles-list']['status'] == 200
+        assert results['reviews-create']['status'] == 201, (
+            'Проверьте, что сценарий записи отзыва удаляет созданный отзыв '
+            'и каждая итерация успешна'
+        )
+        for key in ('queries', 'p50_ms', 'p99_ms', 'memory_kib'):
+            assert results['titles-list'][key] > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_query_regression_fails(self, tmp_path):
+        call_command('generate_data', *GENERATE_ARGS)
+        baseline = tmp_path / 'baseline.json'
+        call_command('benchmark', *BENCHMARK_ARGS, '--only', 'titles-list',
+                     '--update-baseline', '--baseline', str(baseline))
+        data = json.loads(baseline.read_text(encoding='utf-8'))
+        data['results']['titles-list']['queries'] -= 1
+        baseline.write_text(json.dumps(data), encoding='utf-8')
+        with pytest.raises(CommandError, match='titles-list: запросов'):
+            call_command('benchmark', *BENCHMARK_ARGS, '--only',
+                         'titles-list', '--baseline', str(baseline),
+                         '--tolerance', '100')
@@ -0,0 +1,76 @@
+import logging
+
+import pytest
+
+from .common import create_many_titles
+
+
+class Test17QueryBudget:
+
+    def test_01_fingerprint(self):
+        from api.sql import fingerprint
+
+        first = fingerprint(
+            "SELECT * FROM titles WHERE id IN (1, 2, 3) AND name = 'a'"
+        )
+        second = fingerprint(
+            'SELECT *  FROM titles WHERE id IN (%s, %s) AND name = %s'
+        )
+        assert first == second == (
+            'SELECT * FROM titles WHERE id IN (...) AND name = ?'
+        ), 'Проверьте, что отпечаток не зависит от значений параметров'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_n_plus_one_fails_in_tests(self, admin_client, monkeypatch,
+                                          settings):
+        from api.querybudget import QueryBudgetExceeded
+        from api.views import TitleViewSet
+        from reviews.models import Title
+
+        # Строки values() не порождают N+1, проверяется путь DRF.
+        settings.FAST_READ_LISTS = False
+        create_many_titles(admin_client, 5)
+        monkeypatch.setattr(
+            TitleViewSet, 'get_queryset', lambda self: Title.objects.all()
+        )
+        with pytest.raises(QueryBudgetExceeded) as error:
+            admin_client.get('/api/v1/titles/')
+        message = str(error.value)
+        assert 'TitleViewSet.list' in message
+        assert 'N+1' in message and 'api/serializers.py:' in message, (
+            'Проверьте, что нарушение бюджета указывает повторяющийся '
+            'запрос и место его вызова'
+        )
+        assert ('TitleReadSerializer.genre' in message
+                or 'TitleReadSerializer.category' in message), (
+            'Проверьте, что местом вызова N+1 названо поле сериализатора, '
+            'а не миксин представления'
+        )
+        for wrapper in ('api/cache.py', 'api/fastread.py', 'api/views.py'):
+            assert wrapper not in message
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_violation_is_logged_in_production(self, admin_client,
+                                                  settings, monkeypatch,
+                                                  caplog):
+        from api.views import TitleViewSet
+
+        create_many_titles(admin_client, 1)
+        settings.QUERY_BUDGET_RAISE = False
+        monkeypatch.setattr(TitleViewSet, 'query_budgets', {'list': 1})
+        with caplog.at_level(logging.WARNING, logger='api.querybudget'):
+            response = admin_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'TitleViewSet.list' in caplog.text
+        assert 'при бюджете 1' in caplog.text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_query_budget_context_manager(self, admin_client):
+        from api.querybudget import QueryBudgetExceeded, query_budget
+
+        create_many_titles(admin_client, 2)
+        with query_budget(3):
+            admin_client.get('/api/v1/titles/')
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget(2):
+                admin_client.get('/api/v1/titles/')
@@ -0,0 +1,87 @@
+import pstats
+import re
+
+import pytest
+
+from .common import create_many_titles
+
+TIMING_PATTERN = re.compile(r'(\w+);dur=([\d.]+)')
+PHASES = ('db', 'auth', 'throttle', 'view', 'serialize', 'render')
+
+
+def parse_server_timing(header):
+    return {
+        name: float(value) for name, value in TIMING_PATTERN.findall(header)
+    }
+
+
+class Test18ServerTiming:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing_phases(self, admin_client):
+        create_many_titles(admin_client, 3)
+        response = admin_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.has_header('Server-Timing'), (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`'
+        )
+        header = response['Server-Timing']
+        timings = parse_server_timing(header)
+        for phase in (*PHASES, 'total'):
+            assert phase in timings, (
+                f'Проверьте, что `Server-Timing` содержит фазу `{phase}`'
+            )
+        assert 'desc="3 queries"' in header
+        assert timings['db'] > 0 and timings['render'] > 0
+        assert timings['serialize'] > 0, (
+            'Проверьте, что сериализация строк списка выделена '
+            'в фазу `serialize`'
+        )
+        assert sum(timings[phase] for phase in PHASES) <= (
+            timings['total'] + 0.1
+        ), 'Проверьте, что время фаз не пересекается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_profile_requires_token(self, client, settings, tmp_path):
+        settings.PROFILING_TOKEN = 'secret'
+        settings.PROFILING_DIR = str(tmp_path)
+        response = client.get('/api/v1/genres/', HTTP_X_PROFILE='wrong')
+        assert not response.has_header('X-Profile-File')
+        assert not list(tmp_path.iterdir())
+
+        response = client.get('/api/v1/genres/', HTTP_X_PROFILE='secret')
+        assert response.status_code == 200
+        dump = tmp_path / response['X-Profile-File']
+        assert dump.exists(), (
+            'Проверьте, что запрос с верным заголовком `X-Profile` '
+            'сохраняет дамп cProfile в `PROFILING_DIR`'
+        )
+        assert pstats.Stats(str(dump)).total_calls > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_profiling_disabled_without_token(self, client, settings,
+                                                 tmp_path):
+        settings.PROFILING_TOKEN = None
+        settings.PROFILING_DIR = str(tmp_path)
+        response = client.get('/api/v1/genres/', HTTP_X_PROFILE='')
+        assert not response.has_header('X-Profile-File')
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_serialize_phase(self, admin_client, settings):
+        from reviews.models import Title
+
+        create_many_titles(admin_client, 3)
+        title_id = Title.objects.first().pk
+        settings.FAST_READ_LISTS = False
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title_id}/'):
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            timings = parse_server_timing(response['Server-Timing'])
+            assert timings['serialize'] > 0, (
+                'Проверьте, что время сериализатора DRF в list и retrieve '
+                'выделено в фазу `serialize`'
+            )
+            assert sum(timings[phase] for phase in PHASES) <= (
+                timings['total'] + 0.1
+            )
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from .common import create_many_titles
+
+
+def metric_value(text, name, **labels):
+    """Значение метрики с указанными метками из ответа /metrics/."""
+    for line in text.splitlines():
+        match = re.match(r'^(\w+)\{(.*)\} (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2)))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+class Test19Metrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_route_metrics(self, client, admin_client, fresh_registry):
+        create_many_titles(admin_client, 2)
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        client.post('/api/v1/auth/token/', data={})
+
+        response = client.get('/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert metric_value(
+            text, 'yamdb_http_requests_total',
+            route='titles-list', method='GET', status=200,
+        ) == 3, 'Проверьте, что запросы считаются по имени маршрута'
+        assert metric_value(
+            text, 'yamdb_http_requests_total',
+            route='token', method='POST', status=400,
+        ) == 1, 'Проверьте, что маршруты auth имеют имена'
+        assert metric_value(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            route='titles-list', method='GET', le='+Inf',
+        ) == 3
+        assert metric_value(
+            text, 'yamdb_db_queries_total', route='titles-list', method='GET',
+        ) == 3, 'Проверьте, что закэшированные ответы не обращаются к БД'
+        assert metric_value(
+            text, 'yamdb_response_cache_requests_total',
+            resource='titles', result='hit',
+        ) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_multiprocess_aggregation(self, client, settings, tmp_path,
+                                         fresh_registry):
+        settings.METRICS_DIR = str(tmp_path)
+        other = {
+            'requests': {'genres-list\tGET\t200': 5},
+            'latency': {'genres-list\tGET': [5] + [0] * 11 + [0.01, 5]},
+            'queries': {'genres-list\tGET': 10},
+            'cache': {},
+        }
+        other_path = tmp_path / f'metrics-{os.getppid()}-other.json'
+        other_path.write_text(json.dumps(other))
+        client.get('/api/v1/genres/')
+        fresh_registry.flush(force=True)
+        assert list(tmp_path.glob('metrics-*.json')), (
+            'Проверьте, что процесс сохраняет снимок счётчиков в METRICS_DIR'
+        )
+        text = client.get('/metrics/').content.decode()
+        assert metric_value(
+            text, 'yamdb_http_requests_total',
+            route='genres-list', method='GET', status=200,
+        ) == 6, 'Проверьте, что метрики процессов суммируются'
+        assert metric_value(
+            text, 'yamdb_http_request_duration_seconds_count',
+            route='genres-list', method='GET',
+        ) == 6
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_metrics_restricted(self, client):
+        response = client.get('/metrics/', REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_dead_workers_retired(self, client, settings, tmp_path,
+                                     fresh_registry):
+        settings.METRICS_DIR = str(tmp_path)
+        dead_pid = subprocess.Popen([sys.executable, '-c', '']).pid
+        os.waitpid(dead_pid, 0)
+        snapshot = {
+            'requests': {'genres-list\tGET\t200': 2},
+            'latency': {}, 'queries': {}, 'cache': {},
+        }
+        # Два процесса с одним pid (pid переиспользован) и живой процесс.
+        for name in (f'{dead_pid}-first', f'{dead_pid}-second',
+                     f'{os.getppid()}-alive'):
+            (tmp_path / f'metrics-{name}.json').write_text(
+                json.dumps(snapshot)
+            )
+        for _ in range(2):
+            text = client.get('/metrics/').content.decode()
+            assert metric_value(
+                text, 'yamdb_http_requests_total',
+                route='genres-list', method='GET', status=200,
+            ) == 6, (
+                'Проверьте, что снимки процессов с одним pid не '
+                'перезаписывают друг друга и не теряются после '
+                'завершения процессов'
+            )
+        remaining = sorted(path.name for path in tmp_path.glob('metrics-*'))
+        assert remaining == [
+            f'metrics-{os.getppid()}-alive.json', 'metrics-retired.json'
+        ], (
+            'Проверьте, что снимки завершившихся процессов переносятся '
+            'в общий итог'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_metrics_token(self, client, settings):
+        settings.METRICS_TOKEN = 'metrics-secret'
+        response = client.get('/metrics/')
+        assert response.status_code == 403, (
+            'Проверьте, что с METRICS_TOKEN адрес 127.0.0.1 без токена '
+            'не получает метрики: за прокси это адрес любого клиента'
+        )
+        response = client.get(
+            '/metrics/', HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        assert response.status_code == 403
+        response = client.get(
+            '/metrics/', REMOTE_ADDR='10.0.0.1',
+            HTTP_AUTHORIZATION='Bearer metrics-secret',
+        )
+        assert response.status_code == 200
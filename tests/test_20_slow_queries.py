@@ -0,0 +1,134 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_many_titles
+
+
+@pytest.fixture
+def slow_log(settings, tmp_path):
+    from api.slowlog import slow_query_log
+
+    settings.SLOW_QUERY_LOG = str(tmp_path / 'slow.jsonl')
+    settings.SLOW_QUERY_EXPLAIN = True
+    slow_query_log.explained.clear()
+    return tmp_path / 'slow.jsonl'
+
+
+class Test20SlowQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_log_with_plan(self, client, admin_client, settings,
+                              slow_log):
+        create_many_titles(admin_client, 2)
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        client.get('/api/v1/titles/?genre=genre')
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+
+        entries = [
+            json.loads(line)
+            for line in slow_log.read_text(encoding='utf-8').splitlines()
+        ]
+        assert entries, (
+            'Проверьте, что запросы дольше `SLOW_QUERY_THRESHOLD_MS` '
+            'записываются в `SLOW_QUERY_LOG`'
+        )
+        joins = [
+            entry for entry in entries
+            if 'genre_title' in entry['sql'] and 'LIKE' in entry['sql']
+        ]
+        assert joins and joins[0]['plan'], (
+            'Проверьте, что для медленного SELECT сохраняется план запроса'
+        )
+        assert '?' in joins[0]['fingerprint']
+        assert not any(
+            entry['sql'].startswith('EXPLAIN') for entry in entries
+        ), 'Проверьте, что EXPLAIN не попадает в журнал'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_threshold(self, client, settings, slow_log):
+        settings.SLOW_QUERY_THRESHOLD_MS = 10 ** 6
+        client.get('/api/v1/genres/')
+        assert not slow_log.exists()
+
+    def test_03_report_command(self, slow_log):
+        entries = [
+            {'fingerprint': 'SELECT ? FROM a', 'sql': 'SELECT 1 FROM a',
+             'params': [], 'duration_ms': duration, 'call_site': 'x.py:1',
+             'plan': ['SCAN a'] if duration == 30 else None}
+            for duration in (10, 30)
+        ] + [
+            {'fingerprint': 'SELECT ? FROM b', 'sql': 'SELECT 1 FROM b',
+             'params': [], 'duration_ms': 5, 'call_site': 'y.py:2',
+             'plan': None}
+        ]
+        slow_log.write_text(
+            ''.join(json.dumps(entry) + '\n' for entry in entries),
+            encoding='utf-8',
+        )
+        out = StringIO()
+        call_command('slow_queries', '--top', '1', stdout=out)
+        report = out.getvalue()
+        assert 'count=2 total=40.0ms max=30.0ms' in report
+        assert 'SCAN a' in report and 'x.py:1' in report
+        assert 'FROM b' not in report, (
+            'Проверьте, что `--top` ограничивает число отпечатков в отчёте'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_params_redacted(self, client, settings, slow_log):
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        client.get('/api/v1/titles/?name=secret-value')
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        text = slow_log.read_text(encoding='utf-8')
+        assert 'secret-value' not in text, (
+            'Проверьте, что значения параметров запросов не пишутся '
+            'в журнал по умолчанию'
+        )
+        assert all(
+            json.loads(line)['params'] is None for line in text.splitlines()
+        )
+
+        settings.SLOW_QUERY_LOG_PARAMS = True
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        client.get('/api/v1/titles/?name=logged-value')
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        assert 'logged-value' in slow_log.read_text(encoding='utf-8'), (
+            'Проверьте, что SLOW_QUERY_LOG_PARAMS включает запись параметров'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_connection_opened_in_request(self, client, settings,
+                                             slow_log):
+        import threading
+
+        from django.db import connections
+
+        def requests_in_new_thread():
+            # Соединение потока открывается уже внутри запроса, после
+            # обёрток запросов из middleware.
+            try:
+                for slug in ('first', 'second'):
+                    client.get(f'/api/v1/genres/?search={slug}')
+            finally:
+                connections.close_all()
+
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        thread = threading.Thread(target=requests_in_new_thread)
+        thread.start()
+        thread.join()
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        entries = [
+            json.loads(line)
+            for line in slow_log.read_text(encoding='utf-8').splitlines()
+        ]
+        searched = [
+            entry['fingerprint'] for entry in entries
+            if 'LIKE' in entry['sql']
+        ]
+        assert len(searched) >= 2, (
+            'Проверьте, что журнал медленных запросов работает и после '
+            'запроса, открывшего соединение'
+        )
@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+class Test21SqliteTuning:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_pragmas_applied(self):
+        from django.db import connection
+
+        connection.close()
+        with connection.cursor() as cursor:
+            values = {}
+            for name in ('busy_timeout', 'synchronous', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        assert values == {
+            'busy_timeout': 5000, 'synchronous': 1, 'cache_size': -20000,
+        }, (
+            'Проверьте, что `SQLITE_PRAGMAS` применяются к каждому новому '
+            'соединению'
+        )
+
+    def test_02_pragma_validation(self):
+        from reviews.sqlite import pragma_statements
+
+        assert pragma_statements({'journal_mode': 'WAL'}) == [
+            'PRAGMA journal_mode = WAL'
+        ]
+        with pytest.raises(ValueError):
+            pragma_statements({'journal_mode': 'WAL; DROP TABLE titles'})
+
+    def test_03_concurrency_benchmark(self):
+        out = StringIO()
+        call_command(
+            'sqlite_concurrency', '--seconds', '0.3', '--readers', '2',
+            '--writers', '1', '--rows', '100', stdout=out,
+        )
+        report = out.getvalue()
+        assert 'SQLITE_PRAGMAS' in report and 'по умолчанию' in report
+        assert report.count('reads:') == 2 and report.count('writes:') == 2
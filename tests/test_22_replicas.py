@@ -0,0 +1,141 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_many_titles
+
+REPLICA = 'replica_test'
+
+
+def add_replicas(settings, tmp_path, aliases):
+    from django.db import connections
+
+    for alias in aliases:
+        connections.databases[alias] = {
+            **connections.databases['default'],
+            'NAME': str(tmp_path / f'{alias}.sqlite3'),
+            'TEST': {'MIRROR': None},
+        }
+        connections.ensure_defaults(alias)
+    settings.REPLICA_DATABASES = list(aliases)
+
+
+def remove_replicas(aliases):
+    from django.db import connections
+
+    for alias in aliases:
+        connections[alias].close()
+        delattr(connections._connections, alias)
+        del connections.databases[alias]
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    add_replicas(settings, tmp_path, [REPLICA])
+    yield REPLICA
+    remove_replicas([REPLICA])
+
+
+@pytest.fixture
+def two_replicas(settings, tmp_path):
+    aliases = [f'{REPLICA}_1', f'{REPLICA}_2']
+    add_replicas(settings, tmp_path, aliases)
+    yield aliases
+    remove_replicas(aliases)
+
+
+class Test22Replicas:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reads_from_replica(self, client, admin_client, replica):
+        from django.core.cache import cache
+
+        from api.routers import sticky_key
+        from reviews.models import CustomUser, Title
+
+        create_many_titles(admin_client, 1)
+        call_command('sync_replicas')
+        Title.objects.create(name='Только в основной БД', year=2000)
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что чтение списка произведений идёт из реплики'
+        )
+        response = admin_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что пользователь после записи читает '
+            'из основной БД (read-your-writes)'
+        )
+        cache.delete(sticky_key(CustomUser.objects.get(username='TestAdmin')))
+        response = admin_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1
+
+        call_command('sync_replicas')
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что `sync_replicas` обновляет реплики '
+            'и сбрасывает кэш ответов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_go_to_primary(self, admin_client, replica):
+        from api.routers import ReplicaRouter, request_replica
+        from reviews.models import Title
+
+        router = ReplicaRouter()
+        token = request_replica.set(REPLICA)
+        try:
+            assert router.db_for_read(Title) == REPLICA
+            assert router.db_for_write(Title) == 'default'
+        finally:
+            request_replica.reset(token)
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне чтений API запросы идут в основную БД'
+        )
+        assert not router.allow_migrate(REPLICA, 'reviews')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_one_replica_per_request(self, admin_client, user_client,
+                                        two_replicas):
+        from reviews.models import Title
+
+        create_many_titles(admin_client, 1)
+        call_command('sync_replicas')
+        Title.objects.using(two_replicas[1]).create(
+            name='Только во второй реплике', year=2000
+        )
+        counts = set()
+        for _ in range(20):
+            data = user_client.get('/api/v1/titles/').json()
+            assert data['count'] == len(data['results']), (
+                'Проверьте, что все запросы одного API запроса читают '
+                'одну и ту же реплику'
+            )
+            counts.add(data['count'])
+        assert counts == {1, 2}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_sync_replaces_replica_file(self, client, admin_client,
+                                           replica):
+        import os
+        import sqlite3
+
+        from django.db import connections
+
+        create_many_titles(admin_client, 1)
+        call_command('sync_replicas')
+        path = connections[replica].settings_dict['NAME']
+        inode = os.stat(path).st_ino
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+        create_many_titles(admin_client, 2)
+        call_command('sync_replicas')
+        assert os.stat(path).st_ino != inode, (
+            'Проверьте, что `sync_replicas` копирует БД во временный файл '
+            'и подменяет им реплику'
+        )
+        assert not os.path.exists(f'{path}.sync')
+        with sqlite3.connect(path) as target:
+            mode = target.execute('PRAGMA journal_mode').fetchone()[0]
+        assert mode == 'delete'
+        assert client.get('/api/v1/titles/').json()['count'] == 3, (
+            'Проверьте, что соединение с заменённой репликой переоткрывается'
+        )
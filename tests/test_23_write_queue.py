@@ -0,0 +1,130 @@
+import pytest
+
+from .common import create_many_titles
+
+
+@pytest.fixture
+def write_queue_enabled(settings):
+    settings.WRITE_QUEUE_ENABLED = True
+    settings.WRITE_QUEUE_MAX_WAIT_MS = 50
+
+
+class Test23WriteQueue:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_batched_jobs_keep_own_errors(self, write_queue_enabled):
+        from django.db import IntegrityError
+
+        from api.writer import write_queue
+        from reviews.models import Genre
+
+        def create_genre(slug):
+            return Genre.objects.create(name=slug, slug=slug).pk
+
+        batches = write_queue.batches
+        slugs = [f'genre-{number}' for number in range(8)] + ['genre-0']
+        futures = [write_queue.submit(create_genre, slug) for slug in slugs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=10))
+            except IntegrityError:
+                results.append(None)
+
+        assert results[-1] is None and all(results[:-1]), (
+            'Проверьте, что ошибка задачи возвращается только её '
+            'вызывающему, остальные задачи пачки фиксируются'
+        )
+        assert Genre.objects.count() == 8
+        assert write_queue.batches - batches < len(slugs), (
+            'Проверьте, что ожидающие задачи выполняются одной пачкой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_through_queue(self, admin_client, user_client,
+                                      write_queue_enabled):
+        from reviews.models import Comment, Title
+
+        create_many_titles(admin_client, 1)
+        title = Title.objects.get()
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 201
+        response = admin_client.post(url, data={'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        review_id = response.json()['id']
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (12, 2), (
+            'Проверьте, что рейтинг обновляется в той же транзакции'
+        )
+
+        response = admin_client.post(
+            f'{url}{review_id}/comments/', data={'text': 'Комментарий'}
+        )
+        assert response.status_code == 201
+        assert Comment.objects.filter(review_id=review_id).exists()
+
+        response = user_client.post(url, data={'text': 'Ещё', 'score': 1})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_timed_out_job_skipped(self, write_queue_enabled, settings):
+        import threading
+
+        from api.writer import WriteQueueBusy, run_write, write_queue
+        from reviews.models import Genre
+
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(10)
+
+        blocker = write_queue.submit(blocking)
+        assert started.wait(10)
+        settings.WRITE_QUEUE_TIMEOUT = 0.1
+        with pytest.raises(WriteQueueBusy):
+            run_write(Genre.objects.create, name='Поздний', slug='late')
+        release.set()
+        blocker.result(timeout=10)
+        write_queue.submit(lambda: None).result(timeout=10)
+        assert not Genre.objects.filter(slug='late').exists(), (
+            'Проверьте, что задача, не дождавшаяся писателя, отменяется '
+            'и не записывается после ответа с ошибкой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_timeout_response(self, admin_client, user_client,
+                                 write_queue_enabled, settings):
+        import threading
+
+        from api.writer import write_queue
+        from reviews.models import Review, Title
+
+        create_many_titles(admin_client, 1)
+        title = Title.objects.get()
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(10)
+
+        blocker = write_queue.submit(blocking)
+        assert started.wait(10)
+        settings.WRITE_QUEUE_TIMEOUT = 0.1
+        try:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                data={'text': 'Отзыв', 'score': 8}
+            )
+        finally:
+            release.set()
+        blocker.result(timeout=10)
+        assert response.status_code == 503, (
+            'Проверьте, что запрос, не дождавшийся писателя, получает 503'
+        )
+        assert response['Retry-After'] == '1', (
+            'Проверьте, что ответ 503 содержит заголовок Retry-After'
+        )
+        write_queue.submit(lambda: None).result(timeout=10)
+        assert not Review.objects.exists()
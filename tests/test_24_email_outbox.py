@@ -0,0 +1,160 @@
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+
+class FlakyBackend(EmailBackend):
+    """Бэкенд, отказывающий адресам с `bounce` и считающий соединения."""
+
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any('bounce' in address for address in message.to):
+                raise SMTPRecipientsRefused({message.to[0]: (550, b'No')})
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def flaky_backend(settings):
+    settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+    FlakyBackend.opened = 0
+    return FlakyBackend
+
+
+class Test24EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues_mail(self, client):
+        from reviews.models import OUTBOX_STATUS_SENT, OutboxMessage
+
+        outbox_before_count = len(mail.outbox)
+        response = client.post(
+            self.url_signup,
+            data={'email': 'queued@yamdb.fake', 'username': 'queued'}
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что запрос `{self.url_signup}` не отправляет '
+            'письмо сам, а только ставит его в очередь'
+        )
+        message = OutboxMessage.objects.get()
+        assert message.recipient == 'queued@yamdb.fake'
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_outbox` отправляет письма из очереди'
+        )
+        message.refresh_from_db()
+        assert message.status == OUTBOX_STATUS_SENT
+        assert message.sent_at is not None
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batches_reuse_connection(self, flaky_backend):
+        from api.outbox import OutboxSender, enqueue_mail
+
+        for number in range(7):
+            enqueue_mail('Тема', 'Текст', f'user{number}@yamdb.fake')
+
+        sender = OutboxSender(batch_size=3)
+        assert sender.send_pending() == 7
+        sender.close()
+        assert sender.sent == 7
+        assert flaky_backend.opened == 1, (
+            'Проверьте, что все пачки отправляются через одно соединение'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_failed_mail_retried_with_backoff(self, flaky_backend,
+                                                 settings):
+        from django.utils import timezone
+
+        from api.outbox import OutboxSender, enqueue_mail
+        from reviews.models import OUTBOX_STATUS_FAILED, OutboxMessage
+
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 10
+        outbox_before_count = len(mail.outbox)
+        bounce = enqueue_mail('Тема', 'Текст', 'bounce@yamdb.fake')
+        enqueue_mail('Тема', 'Текст', 'ok@yamdb.fake')
+
+        sender = OutboxSender()
+        sender.send_pending()
+        assert (sender.sent, sender.failed) == (1, 1), (
+            'Проверьте, что ошибка одного письма не мешает отправке остальных'
+        )
+        assert len(mail.outbox) == outbox_before_count + 1
+
+        delays = []
+        for attempt in range(1, 4):
+            bounce.refresh_from_db()
+            assert bounce.attempts == attempt
+            delays.append(
+                (bounce.next_attempt_at - timezone.now()).total_seconds()
+            )
+            OutboxMessage.objects.filter(pk=bounce.pk).update(
+                next_attempt_at=timezone.now()
+            )
+            sender.send_pending()
+        bounce.refresh_from_db()
+        assert bounce.status == OUTBOX_STATUS_FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток '
+            'письмо помечается неотправленным'
+        )
+        assert 'SMTPRecipientsRefused' in bounce.last_error
+        assert 5 < delays[0] <= 10 and 15 < delays[1] <= 20, (
+            'Проверьте, что задержка повтора растёт экспоненциально'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_claim_returns_only_claimed(self, monkeypatch):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from api import outbox
+        from reviews.models import OutboxMessage
+
+        for number in range(3):
+            outbox.enqueue_mail('Тема', 'Текст', f'user{number}@yamdb.fake')
+        due_messages = outbox.due_messages
+        taken_elsewhere = timezone.now() + timedelta(hours=1)
+
+        def due_then_claimed_elsewhere(now, batch_size):
+            messages = due_messages(now, batch_size)
+            # Другой обработчик забрал первое письмо после чтения.
+            OutboxMessage.objects.filter(pk=messages[0].pk).update(
+                next_attempt_at=taken_elsewhere
+            )
+            return messages
+
+        monkeypatch.setattr(
+            outbox, 'due_messages', due_then_claimed_elsewhere
+        )
+        messages = outbox.claim_batch(10)
+        first = OutboxMessage.objects.order_by('pk').first()
+        assert {message.pk for message in messages} == set(
+            OutboxMessage.objects.exclude(pk=first.pk).values_list(
+                'pk', flat=True
+            )
+        ), (
+            'Проверьте, что claim_batch возвращает только письма, '
+            'которые он действительно забрал'
+        )
+        first.refresh_from_db()
+        assert first.next_attempt_at == taken_elsewhere, (
+            'Проверьте, что claim_batch не продлевает аренду чужих писем'
+        )
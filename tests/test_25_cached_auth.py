@@ -0,0 +1,182 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "custom_user"' in query['sql']
+    ]
+
+
+class Test25CachedAuth:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_cached_between_requests(self, user_client):
+        user_client.get('/api/v1/categories/')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert not user_queries(context), (
+            'Проверьте, что при повторном запросе пользователь JWT токена '
+            'берётся из кэша, а не из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_invalidates_cache(self, admin_client, user,
+                                              user_client):
+        data = {'name': 'Фильм', 'slug': 'films'}
+        response = user_client.post('/api/v1/categories/', data=data)
+        assert response.status_code == 403
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        response = user_client.post('/api/v1/categories/', data=data)
+        assert response.status_code == 201, (
+            'Проверьте, что смена роли через `/users/{username}/` '
+            'сбрасывает кэш пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_trusted_role_claim(self, admin, settings):
+        from rest_framework.test import APIClient
+
+        from api.authentication import token_for_user
+
+        settings.JWT_TRUST_ROLE_CLAIM = True
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(admin)}'
+        )
+        # Первый запрос читает время отзыва токенов в кэш.
+        client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+            )
+        assert response.status_code == 201
+        assert not user_queries(context), (
+            'Проверьте, что при JWT_TRUST_ROLE_CLAIM роль берётся '
+            'из подписанного поля токена'
+        )
+
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['email'] == admin.email, (
+            'Проверьте, что `/users/me/` возвращает полную запись '
+            'пользователя из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cache_holds_no_secrets(self, user, user_client):
+        from django.core.cache import cache
+
+        from api.authentication import user_key
+
+        user.confirmation_code = 'secret-code'
+        user.save()
+        user_client.get('/api/v1/categories/')
+        cached = cache.get(user_key(user.pk))
+        assert cached is not None
+        assert user.password not in cached and 'secret-code' not in cached, (
+            'Проверьте, что в кэше аутентификации нет хэша пароля '
+            'и кода подтверждения'
+        )
+        response = user_client.get('/api/v1/users/me/')
+        assert response.json()['email'] == user.email
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_deactivation_in_other_process(self, user, user_client):
+        from django.db import connection
+
+        from .common import run_in_other_process
+
+        user_client.get('/api/v1/categories/')
+        assert connection.vendor == 'sqlite'
+        # Другой процесс не видит тестовую БД в памяти, поэтому он
+        # сбрасывает кэш так же, как сигнал сохранения пользователя.
+        run_in_other_process(
+            'from api.authentication import user_cache, user_key; '
+            f'user_cache().delete(user_key({user.pk}))'
+        )
+        user.__class__.objects.filter(pk=user.pk).update(is_active=False)
+        response = user_client.get('/api/v1/categories/')
+        assert response.status_code == 401, (
+            'Проверьте, что сброс кэша пользователя в одном процессе '
+            'действует во всех процессах'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_trusted_claims_revoked(self, admin, admin_client, user,
+                                       settings):
+        from rest_framework.test import APIClient
+
+        from api.authentication import token_for_user
+
+        settings.JWT_TRUST_ROLE_CLAIM = True
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(admin)}'
+        )
+        data = {'name': 'Драма', 'slug': 'drama'}
+        assert client.post('/api/v1/genres/', data=data).status_code == 201
+
+        admin.bio = 'Новая биография'
+        admin.save()
+        response = client.get('/api/v1/genres/')
+        assert response.status_code == 200, (
+            'Проверьте, что правка профиля не отзывает токены'
+        )
+
+        admin.is_active = False
+        admin.save()
+        response = client.post(
+            '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        assert response.status_code == 401, (
+            'Проверьте, что деактивация пользователя отзывает токены '
+            'с подписанной ролью'
+        )
+
+        user_token = token_for_user(user)
+        user.delete()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {user_token}')
+        assert client.get('/api/v1/genres/').status_code == 401, (
+            'Проверьте, что удаление пользователя отзывает его токены'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_revocation_survives_cache_eviction(self, admin, user,
+                                                   settings):
+        from rest_framework.test import APIClient
+
+        from api.authentication import revoked_key, token_for_user, user_cache
+
+        settings.JWT_TRUST_ROLE_CLAIM = True
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(admin)}'
+        )
+        assert client.get('/api/v1/genres/').status_code == 200
+
+        admin.role = 'user'
+        admin.save()
+        user_cache().delete(revoked_key(admin.pk))
+        response = client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        assert response.status_code == 401, (
+            'Проверьте, что отзыв токенов хранится в БД и действует '
+            'после вытеснения отметки из кэша'
+        )
+
+        user_token = token_for_user(user)
+        user.delete()
+        user_cache().delete(revoked_key(user.pk))
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {user_token}')
+        assert client.get('/api/v1/genres/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя отклоняется '
+            'без отметки отзыва в кэше'
+        )
@@ -0,0 +1,139 @@
+import pytest
+
+
+@pytest.fixture
+def strict_rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'anon': '3/hour',
+            'user': '100/hour',
+            'anon:signup': '2/hour',
+            'anon:titles': '5/hour',
+        },
+    }
+
+
+class Test26Throttling:
+
+    def test_01_sliding_window(self):
+        from api.throttling import sliding_window
+
+        state = None
+        for _ in range(3):
+            allowed, state, wait = sliding_window(state, 100, 3, 60)
+            assert allowed
+        allowed, state, wait = sliding_window(state, 110, 3, 60)
+        assert not allowed and wait == 10, (
+            'Проверьте, что сверх лимита окна запрос отклоняется '
+            'до конца окна'
+        )
+        allowed, state, wait = sliding_window(state, 125, 3, 60)
+        assert not allowed, (
+            'Проверьте, что запросы предыдущего окна учитываются с весом'
+        )
+        allowed, state, wait = sliding_window(state, 170, 3, 60)
+        assert allowed and state == (120, 1, 3)
+
+    def test_02_token_bucket(self):
+        from api.throttling import token_bucket
+
+        state = None
+        for _ in range(4):
+            allowed, state, wait = token_bucket(state, 0, 4, 60)
+            assert allowed
+        allowed, state, wait = token_bucket(state, 0, 4, 60)
+        assert not allowed and wait == pytest.approx(15), (
+            'Проверьте, что пустая корзина сообщает время до нового токена'
+        )
+        allowed, state, wait = token_bucket(state, 15, 4, 60)
+        assert allowed, 'Проверьте, что корзина пополняется со временем'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_endpoint_scopes(self, client, strict_rates):
+        for number in range(2):
+            response = client.post('/api/v1/auth/signup/', data={
+                'email': f'user{number}@yamdb.fake',
+                'username': f'user{number}',
+            })
+            assert response.status_code == 200
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'user2@yamdb.fake', 'username': 'user2',
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что `/auth/signup/` ограничен собственным лимитом'
+        )
+        assert response.has_header('Retry-After')
+
+        for _ in range(5):
+            assert client.get('/api/v1/titles/').status_code == 200, (
+                'Проверьте, что чтение произведений имеет отдельный, '
+                'более мягкий лимит'
+            )
+        assert client.get('/api/v1/titles/').status_code == 429
+        for _ in range(3):
+            assert client.get('/api/v1/genres/').status_code == 200
+        assert client.get('/api/v1/genres/').status_code == 429
+
+    def test_04_store_shared_between_connections(self, throttle_db):
+        from api.throttling import SQLiteThrottleStore, sliding_window
+
+        def algorithm(state, now):
+            return sliding_window(state, now, 2, 60)
+
+        first, second = SQLiteThrottleStore(), SQLiteThrottleStore()
+        assert first.update('key', algorithm, 0, 120)[0]
+        assert second.update('key', algorithm, 1, 120)[0]
+        assert not first.update('key', algorithm, 2, 120)[0], (
+            'Проверьте, что состояние троттлинга общее для всех '
+            'соединений с THROTTLE_DB'
+        )
+        assert second.update('other', algorithm, 2, 120)[0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_cache_store_clear_keeps_other_keys(self, settings):
+        from django.core.cache import caches
+
+        from api.throttling import CacheThrottleStore, sliding_window
+
+        def algorithm(state, now):
+            return sliding_window(state, now, 1, 60)
+
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        cache.set('version:titles', 1)
+        store = CacheThrottleStore()
+        assert store.update('throttle:key', algorithm, 0, 120)[0]
+        assert not store.update('throttle:key', algorithm, 1, 120)[0]
+        store.clear()
+        assert cache.get('version:titles') == 1, (
+            'Проверьте, что очистка троттлинга не удаляет остальные '
+            'ключи общего кэша'
+        )
+        assert store.update('throttle:key', algorithm, 2, 120)[0], (
+            'Проверьте, что после clear() состояния троттлинга сброшены'
+        )
+
+    def test_06_busy_store_fails_open(self, throttle_db, settings, caplog):
+        import sqlite3
+
+        from api.throttling import SQLiteThrottleStore, sliding_window
+
+        def algorithm(state, now):
+            return sliding_window(state, now, 1, 60)
+
+        store = SQLiteThrottleStore()
+        assert store.update('key', algorithm, 0, 120)[0]
+        settings.THROTTLE_DB_TIMEOUT = 0.05
+        blocker = sqlite3.connect(throttle_db, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        try:
+            busy = SQLiteThrottleStore()
+            with caplog.at_level('WARNING', logger='api.throttling'):
+                assert busy.update('key', algorithm, 1, 120) == (True, None), (
+                    'Проверьте, что занятая база троттлинга пропускает '
+                    'запрос, а не приводит к ошибке 500'
+                )
+        finally:
+            blocker.execute('ROLLBACK')
+            blocker.close()
+        assert 'THROTTLE_DB' in caplog.text
@@ -0,0 +1,140 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+def genre_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if '"genres"."slug" IN' in query['sql']
+        or '"genres"."slug" =' in query['sql']
+    ]
+
+
+class Test27GenreSync:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_slugs_resolved_in_one_query(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Поворот', 'year': 2000,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert len(genre_queries(context)) == 1, (
+            'Проверьте, что слаги жанров разрешаются одним запросом'
+        )
+        assert len(response.json()['genre']) == len(genres)
+
+        data['genre'] = ['horror', 'unknown', 'missing']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400
+        errors = ' '.join(response.json()['genre'])
+        assert 'unknown' in errors and 'missing' in errors, (
+            'Проверьте, что все неизвестные слаги жанров '
+            'возвращаются в одной ошибке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_update_changes_only_diff(self, admin_client):
+        from reviews.models import GenreTitle
+
+        create_genre(admin_client)
+        categories = create_categories(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Поворот', 'year': 2000, 'genre': ['horror', 'comedy'],
+            'category': categories[0]['slug'],
+        })
+        title_id = response.json()['id']
+        kept = GenreTitle.objects.get(title_id=title_id, genre__slug='horror')
+        # Прогреваем кэш карточки произведения.
+        admin_client.get(f'/api/v1/titles/{title_id}/')
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/',
+            data={'genre': ['horror', 'drama']},
+        )
+        assert response.status_code == 200
+        assert {genre['slug'] for genre in response.json()['genre']} == {
+            'horror', 'drama'
+        }
+        assert GenreTitle.objects.filter(pk=kept.pk).exists(), (
+            'Проверьте, что оставшиеся жанры не пересоздаются'
+        )
+        assert set(GenreTitle.objects.filter(
+            title_id=title_id
+        ).values_list('genre__slug', flat=True)) == {'horror', 'drama'}
+
+        response = admin_client.get(f'/api/v1/titles/{title_id}/')
+        assert {genre['slug'] for genre in response.json()['genre']} == {
+            'horror', 'drama'
+        }, 'Проверьте, что смена жанров сбрасывает кэш произведения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_sync_constant_queries(self):
+        from reviews.models import Genre, GenreTitle, Title
+
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(3)
+        )
+        genres = list(Genre.objects.order_by('slug'))
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000)
+            for number in range(1200)
+        )
+        title_ids = list(Title.objects.values_list('pk', flat=True))
+        GenreTitle.objects.sync(
+            {title_id: [genres[0].pk, genres[1].pk] for title_id in title_ids}
+        )
+        assert GenreTitle.objects.count() == 2400
+
+        target = {title_id: [genres[1].pk, genres[2].pk]
+                  for title_id in title_ids}
+        with CaptureQueriesContext(connection) as context:
+            changed = GenreTitle.objects.sync(target)
+        assert changed == set(title_ids)
+        assert len(context.captured_queries) <= 12, (
+            'Проверьте, что число запросов синхронизации не зависит '
+            'от числа связей'
+        )
+        assert GenreTitle.objects.count() == 2400
+        assert not GenreTitle.objects.filter(genre=genres[0]).exists()
+        assert GenreTitle.objects.sync(target) == set()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_sync_is_atomic(self):
+        from django.db import IntegrityError
+
+        from reviews.models import Genre, GenreTitle, Title
+
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(2)
+        )
+        first, second = Genre.objects.order_by('slug')
+        title = Title.objects.create(name='Поворот', year=2000)
+        GenreTitle.objects.sync({title.pk: [first.pk, second.pk]})
+
+        with pytest.raises(IntegrityError):
+            GenreTitle.objects.sync({title.pk: [second.pk, 10 ** 6]})
+        assert set(GenreTitle.objects.filter(title=title).values_list(
+            'genre_id', flat=True
+        )) == {first.pk, second.pk}, (
+            'Проверьте, что ошибка синхронизации откатывает удаление '
+            'лишних связей'
+        )
+
+    def test_05_raw_delete_has_no_dependents(self):
+        from reviews.models import GenreTitle
+
+        assert not GenreTitle._meta.related_objects, (
+            'GenreTitleQuerySet.sync удаляет связи через _raw_delete() без '
+            'каскадов: на GenreTitle не должна ссылаться ни одна модель'
+        )
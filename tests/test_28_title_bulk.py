@@ -0,0 +1,177 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+URL = '/api/v1/titles/bulk/'
+
+
+def titles_payload(count, start=0):
+    return [
+        {
+            'name': f'Произведение {number}', 'year': 2000,
+            'genre': ['horror', 'comedy'], 'category': 'films',
+        }
+        for number in range(start, start + count)
+    ]
+
+
+class Test28TitleBulk:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_partial_failure(self, admin_client, client):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        response = admin_client.post(
+            URL, data=titles_payload(1), format='json'
+        )
+        assert response.status_code == 201
+        title_id = response.json()['results'][0]['id']
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+
+        items = [
+            {'name': 'Новое', 'year': 2001, 'genre': ['drama'],
+             'category': 'books'},
+            {'name': 'Без жанра', 'year': 2001, 'genre': ['unknown'],
+             'category': 'books'},
+            {'id': title_id, 'genre': ['drama'], 'year': 1999},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'name': 'Из будущего', 'year': 3000, 'genre': [],
+             'category': 'films'},
+        ]
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что при ошибках части элементов '
+            '`/api/v1/titles/bulk/` возвращает статус 207'
+        )
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            201, 400, 200, 404, 400
+        ], 'Проверьте, что результат возвращается по каждому элементу'
+        assert 'genre' in results[1]['errors']
+        assert 'year' in results[4]['errors']
+
+        created = Title.objects.get(pk=results[0]['id'])
+        assert list(created.genre.values_list('slug', flat=True)) == [
+            'drama'
+        ]
+        updated = Title.objects.get(pk=title_id)
+        assert updated.year == 1999 and updated.name == 'Произведение 0'
+        assert list(updated.genre.values_list('slug', flat=True)) == [
+            'drama'
+        ]
+        assert Title.objects.count() == 2
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что массовая запись сбрасывает кэш списка'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ndjson_constant_queries(self, admin_client):
+        from reviews.models import GenreTitle, Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        counts = []
+        for count, start in ((5, 0), (50, 5)):
+            body = '\n'.join(
+                json.dumps(item) for item in titles_payload(count, start)
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(
+                    URL, data=body, content_type='application/x-ndjson'
+                )
+            assert response.status_code == 201, (
+                'Проверьте, что `/api/v1/titles/bulk/` принимает NDJSON'
+            )
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов не зависит от размера пачки'
+        )
+        assert Title.objects.count() == 55
+        assert GenreTitle.objects.count() == 110
+
+        response = admin_client.post(
+            URL, data='{"name": \n', content_type='application/x-ndjson'
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_permissions_and_format(self, admin_client, user_client,
+                                       settings):
+        response = user_client.post(URL, data=[], format='json')
+        assert response.status_code == 403, (
+            'Проверьте, что массовая запись доступна только администратору'
+        )
+        response = admin_client.post(
+            URL, data={'name': 'Не список'}, format='json'
+        )
+        assert response.status_code == 400
+        settings.TITLE_BULK_MAX_ITEMS = 2
+        response = admin_client.post(
+            URL, data=titles_payload(3), format='json'
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_update_writes_only_sent_fields(self, admin_client,
+                                               monkeypatch):
+        from api import bulk
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        response = admin_client.post(
+            URL, data=titles_payload(2), format='json'
+        )
+        first, second = (
+            result['id'] for result in response.json()['results']
+        )
+        load_titles = bulk.load_titles
+
+        def load_then_edit(items):
+            titles = load_titles(items)
+            # Правка, которую пачка не передавала, после чтения объектов.
+            Title.objects.filter(pk=first).update(
+                name='Параллельная правка'
+            )
+            return titles
+
+        monkeypatch.setattr(bulk, 'load_titles', load_then_edit)
+        response = admin_client.post(URL, data=[
+            {'id': first, 'year': 1999},
+            {'id': second, 'name': 'Новое название'},
+        ], format='json')
+        assert response.status_code == 200
+        title = Title.objects.get(pk=first)
+        assert title.year == 1999
+        assert title.name == 'Параллельная правка', (
+            'Проверьте, что массовое обновление пишет только поля, '
+            'переданные в элементе, и не откатывает чужие правки'
+        )
+        assert Title.objects.get(pk=second).name == 'Новое название'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_bulk_insert_writes_first(self):
+        from reviews.models import Title
+
+        Title.objects.bulk_insert([Title(name='Старое', year=2000)])
+        titles = [Title(name=f'Новое {number}', year=2000)
+                  for number in range(3)]
+        with CaptureQueriesContext(connection) as context:
+            Title.objects.bulk_insert(titles)
+        statements = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(('BEGIN', 'SAVEPOINT'))
+        ]
+        assert statements[0].startswith('INSERT'), (
+            'Проверьте, что bulk_insert сначала вставляет строки: чтение '
+            'до вставки начинает транзакцию SQLite со снимка'
+        )
+        assert [Title.objects.get(pk=title.pk).name for title in titles] == [
+            title.name for title in titles
+        ]
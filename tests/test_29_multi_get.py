@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_many_titles
+
+
+class Test29MultiGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_by_ids(self, client, admin, admin_client):
+        from reviews.models import Review, Title
+
+        create_many_titles(admin_client, 6)
+        titles = list(Title.objects.order_by('pk'))
+        Review.objects.create(
+            title=titles[2], author=admin, text='Отзыв', score=8
+        )
+        Title.objects.filter(pk=titles[2].pk).update_rating(8, 1)
+        ids = [titles[2].pk, titles[0].pk, 10 ** 6, titles[5].pk]
+
+        response = client.get(
+            '/api/v1/titles/', {'ids': ','.join(map(str, ids))}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[2].pk, titles[0].pk, titles[5].pk
+        ], 'Проверьте, что `?ids=` возвращает произведения в порядке id'
+        assert data['missing'] == [10 ** 6], (
+            'Проверьте, что отсутствующие id перечисляются в `missing`'
+        )
+        first = data['results'][0]
+        assert first['rating'] == 8
+        assert len(first['genre']) == 3 and first['category']['slug']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_constant_queries(self, client, admin_client):
+        from reviews.models import Title
+
+        create_many_titles(admin_client, 30)
+        ids = list(Title.objects.values_list('pk', flat=True))
+        counts = []
+        for chunk in (ids[:3], ids):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(
+                    '/api/v1/titles/', {'ids': ','.join(map(str, chunk))}
+                )
+            assert len(response.json()['results']) == len(chunk)
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1] <= 2, (
+            'Проверьте, что `?ids=` читает произведения фиксированным '
+            'числом запросов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_ids(self, client, settings):
+        response = client.get('/api/v1/titles/', {'ids': '1,abc'})
+        assert response.status_code == 400
+        settings.MULTI_GET_MAX_IDS = 2
+        response = client.get('/api/v1/titles/', {'ids': '1,2,3'})
+        assert response.status_code == 400, (
+            'Проверьте, что число id в `?ids=` ограничено'
+        )
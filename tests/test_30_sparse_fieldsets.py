@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_many_titles, create_reviews
+
+
+def captured_sql(context):
+    return ' '.join(query['sql'] for query in context.captured_queries)
+
+
+class Test30SparseFieldsets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fields(self, client, admin_client):
+        create_many_titles(admin_client, 5)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', {'fields': 'id,name'})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 5
+        assert all(set(title) == {'id', 'name'} for title in results), (
+            'Проверьте, что `?fields=` оставляет в ответе только '
+            'запрошенные поля'
+        )
+        sql = captured_sql(context)
+        assert '"description"' not in sql and '"score_sum"' not in sql, (
+            'Проверьте, что колонки незапрошенных полей не читаются из БД'
+        )
+        assert 'reviews_genre' not in sql and 'reviews_category' not in sql, (
+            'Проверьте, что незапрошенные связи не подгружаются'
+        )
+
+        response = client.get('/api/v1/titles/', {'exclude': 'description'})
+        title = response.json()['results'][0]
+        assert 'description' not in title
+        assert {'id', 'name', 'rating', 'genre', 'category'} <= set(title)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_exclude(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'exclude': 'text,author'})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == len(reviews)
+        assert all(
+            'text' not in review and 'author' not in review
+            and 'score' in review for review in results
+        ), 'Проверьте, что `?exclude=` убирает поля из ответа'
+        assert '"text"' not in captured_sql(context)
+
+        response = client.get(
+            f'{url}{reviews[0]["id"]}/', {'fields': 'id,score'}
+        )
+        assert response.json() == {'id': reviews[0]['id'], 'score': 5}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_field(self, client, admin_client):
+        create_many_titles(admin_client, 1)
+        response = client.get('/api/v1/titles/', {'fields': 'id,secret'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное поле в `?fields=` возвращает 400'
+        )
+        assert 'secret' in response.json()['fields']
+        response = client.get('/api/v1/genres/', {'exclude': 'pk'})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_cursor_pagination(self, client, admin_client):
+        create_many_titles(admin_client, 30)
+        url = '/api/v1/titles/?pagination=cursor&fields=id,year'
+        names = []
+        counts = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            names.extend(data['results'])
+            counts.append(len(context.captured_queries))
+            url = data['next']
+        assert len(names) == 30
+        assert len({title['id'] for title in names}) == 30
+        assert set(counts) == {1}, (
+            'Проверьте, что курсорная пагинация с `?fields=` не делает '
+            'запросов на каждую строку'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_writes_ignore_fields(self, admin_client):
+        response = admin_client.post(
+            '/api/v1/genres/?fields=slug',
+            data={'name': 'Триллер', 'slug': 'thriller'},
+        )
+        assert response.status_code == 201
+        assert response.json() == {'name': 'Триллер', 'slug': 'thriller'}, (
+            'Проверьте, что `?fields=` действует только на чтение'
+        )
@@ -0,0 +1,120 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments, create_many_titles
+
+GENERATE_ARGS = (
+    '--users', '10', '--categories', '2', '--genres', '4', '--titles', '12',
+    '--reviews', '30', '--comments', '15', '--seed', 'fast-read',
+)
+
+
+def fetch_both(client, settings, url, params=None):
+    """
+    Ответ и число запросов со строками values() и с сериализаторами.
+    Первым идёт запрос через сериализаторы: он прогревает кэш
+    пользователя JWT, и запросы сравниваются на равных.
+    """
+    results = []
+    for enabled in (False, True):
+        settings.FAST_READ_LISTS = enabled
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == 200
+        results.insert(0, (response.json(), len(context.captured_queries)))
+    return results
+
+
+def assert_same_items(fast, drf, url):
+    assert len(fast) == len(drf)
+    for fast_item, drf_item in zip(fast, drf):
+        assert list(fast_item) == list(drf_item), (
+            f'Проверьте, что быстрый список `{url}` выводит те же поля '
+            'в том же порядке'
+        )
+        for field, value in drf_item.items():
+            assert fast_item[field] == value, (
+                f'Проверьте поле `{field}` быстрого списка `{url}`'
+            )
+
+
+class Test31FastRead:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_match_serializer(self, admin_client, settings):
+        from reviews.models import Category, Review, Title
+
+        call_command('generate_data', *GENERATE_ARGS)
+        Review.objects.filter(title=Title.objects.first()).delete()
+        Title.objects.rebuild_ratings()
+        Title.objects.filter(pk=Title.objects.last().pk).update(
+            category=None, description=None
+        )
+        assert Category.objects.exists()
+        for params in (None, {'page': 2}, {'pagination': 'cursor'},
+                       {'fields': 'name,genre,rating'}, {'genre': 'x'}):
+            (fast, fast_queries), (drf, drf_queries) = fetch_both(
+                admin_client, settings, '/api/v1/titles/', params
+            )
+            assert fast.keys() == drf.keys()
+            assert fast.get('next') == drf.get('next'), (
+                'Проверьте, что пагинация быстрого списка не меняется'
+            )
+            assert_same_items(fast['results'], drf['results'], 'titles')
+            assert fast_queries <= drf_queries, (
+                'Проверьте, что быстрый список не делает лишних запросов'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_publications_match_serializer(self, admin_client, admin,
+                                              settings):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        )
+        for url in urls:
+            for params in (None, {'pagination': 'cursor'}):
+                (fast, fast_queries), (drf, drf_queries) = fetch_both(
+                    admin_client, settings, url, params
+                )
+                assert fast['results'], url
+                assert_same_items(fast['results'], drf['results'], url)
+                assert fast_queries <= drf_queries
+        settings.FAST_READ_LISTS = True
+        response = admin_client.get(urls[0])
+        assert response.json()['results'][0]['pub_date'].endswith('Z'), (
+            'Проверьте, что даты быстрого списка в формате ISO 8601'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_constant_queries(self, client, admin_client):
+        create_many_titles(admin_client, 3)
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/', {'pagination': 'cursor'})
+        small = len(context.captured_queries)
+        create_many_titles(admin_client, 30)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', {'pagination': 'cursor'})
+        assert len(response.json()['results']) > 3
+        assert len(context.captured_queries) <= small, (
+            'Проверьте, что быстрый список читает жанры одним запросом '
+            'на страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rows_benchmark(self, capsys):
+        call_command('generate_data', *GENERATE_ARGS)
+        call_command('benchmark', '--current-db', '--rows',
+                     '--iterations', '1')
+        output = capsys.readouterr().out
+        for name in ('titles', 'genres', 'reviews', 'comments'):
+            assert name in output, (
+                f'Проверьте, что `benchmark --rows` замеряет список `{name}`'
+            )
+        assert 'строк/с' in output